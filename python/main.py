@@ -1,7 +1,9 @@
 import argparse
 import sys
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List
 
+from task_completion_detector import screen_capture
 from task_completion_detector.config_loader import ConfigLoader
 from task_completion_detector.monitor import MonitorSettings, RegionMonitor
 
@@ -12,10 +14,14 @@ def _load_monitor_settings(cfg: Dict[str, Any], mode: str = "stable") -> Monitor
     - For stability mode (task-watch), values are read from the legacy "monitor" section.
     - For change mode (change-watch), values are read from "monitorChange" when present,
       falling back to "monitor" for backward compatibility.
+    - For template mode, values are read from "monitorTemplate", falling back to
+      "monitorChange" and then "monitor".
     """
 
     if mode == "change":
         monitor_cfg = cfg.get("monitorChange") or cfg.get("monitor", {})
+    elif mode == "template":
+        monitor_cfg = cfg.get("monitorTemplate") or cfg.get("monitorChange") or cfg.get("monitor", {})
     else:
         monitor_cfg = cfg.get("monitor", {})
 
@@ -27,6 +33,12 @@ def _load_monitor_settings(cfg: Dict[str, Any], mode: str = "stable") -> Monitor
         interval_seconds=interval,
         stable_seconds_threshold=stable_seconds,
         difference_threshold=diff_threshold,
+        auto_threshold=bool(monitor_cfg.get("autoThreshold", False)),
+        calibration_seconds=float(monitor_cfg.get("calibrationSeconds", 30.0)),
+        threshold_sigma=float(monitor_cfg.get("thresholdSigma", 4.0)),
+        match_threshold=float(monitor_cfg.get("matchThreshold", 0.9)),
+        # One capture backend for every mode
+        capture_backend=str(cfg.get("monitor", {}).get("captureBackend", "auto")),
     )
 
 
@@ -68,14 +80,109 @@ def cmd_select_region(args: argparse.Namespace) -> None:
         )
 
 
+def _monitor_text_source(args: argparse.Namespace, cfg: Dict[str, Any], config_loader: ConfigLoader) -> None:
+    """Watch a log file instead of a screen region (monitor --file)."""
+    from task_completion_detector.text_monitor import TextSourceMonitor
+
+    import re
+
+    pattern = getattr(args, "pattern", None)
+    if pattern:
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            print(f"Invalid --pattern '{pattern}': {exc}")
+            sys.exit(1)
+    is_change = getattr(args, "change", False) or bool(pattern)
+    settings = _load_monitor_settings(cfg, mode="change" if is_change else "stable")
+    stable_override = getattr(args, "stable_seconds", None)
+    if (not is_change) and (stable_override is not None):
+        settings.stable_seconds_threshold = float(stable_override)
+
+    monitor = TextSourceMonitor(args.file, settings, config_loader, pattern=pattern)
+    if is_change:
+        monitor.monitor_until_change()
+    else:
+        monitor.monitor_until_stable()
+
+
+def _monitor_process(args: argparse.Namespace, cfg: Dict[str, Any], config_loader: ConfigLoader) -> None:
+    """Watch a process tree instead of a screen region (monitor --pid)."""
+    from task_completion_detector.process_monitor import ProcessMonitor, process_exists
+
+    try:
+        if not process_exists(args.pid):
+            print(f"No process with pid {args.pid} is running.")
+            sys.exit(1)
+    except RuntimeError as exc:
+        print(exc)
+        sys.exit(1)
+
+    settings = _load_monitor_settings(cfg, mode="stable")
+    stable_override = getattr(args, "stable_seconds", None)
+    if stable_override is not None:
+        settings.stable_seconds_threshold = float(stable_override)
+    process_cfg = cfg.get("monitorProcess", {})
+
+    monitor = ProcessMonitor(
+        args.pid,
+        settings,
+        config_loader,
+        cpu_idle_percent=float(process_cfg.get("cpuIdlePercent", 2.0)),
+        io_idle_bytes_per_second=float(process_cfg.get("ioIdleBytesPerSecond", 4096.0)),
+    )
+    if getattr(args, "exit", False):
+        try:
+            monitor.monitor_until_exit()
+        except RuntimeError as exc:
+            print(exc)
+            sys.exit(1)
+        return
+    try:
+        monitor.monitor_until_idle()
+    except RuntimeError as exc:
+        print(f"{exc} Use --exit to only wait for the process to finish.")
+        sys.exit(1)
+
+
+def _profiled(args: argparse.Namespace):
+    """Profiler context for --profile, or a no-op context without it."""
+    import contextlib
+
+    if not getattr(args, "profile", None):
+        return contextlib.nullcontext()
+    from task_completion_detector.profiling import MonitorProfiler
+
+    return MonitorProfiler(args.profile, report_interval=args.profile_interval, keep=args.profile_keep)
+
+
 def cmd_monitor(args: argparse.Namespace) -> None:
     """Monitor a region, falling back to interactive selection if the name is unknown.
 
     Args:
         args (argparse.Namespace): Parsed CLI args with region name, monitoring mode, and overrides.
     """
+    with _profiled(args):
+        _monitor(args)
+
+
+def _monitor(args: argparse.Namespace) -> None:
     config_loader = ConfigLoader()
     cfg = config_loader.load()
+
+    if getattr(args, "pid", None) is not None:
+        _monitor_process(args, cfg, config_loader)
+        return
+    if getattr(args, "file", None):
+        _monitor_text_source(args, cfg, config_loader)
+        return
+    if not args.name:
+        print("Either --name (screen region), --file (text source) or --pid (process) is required.")
+        sys.exit(1)
+    if _load_monitor_settings(cfg).capture_backend in ("auto", "xshm"):
+        # XInitThreads has to come before any other Xlib use in the process, the region selector's Tk included
+        screen_capture.init_threads()
+
     region_cfg: Dict[str, Any]
     region_obj = None
     try:
@@ -106,25 +213,389 @@ def cmd_monitor(args: argparse.Namespace) -> None:
         height=int(region_cfg["height"]),
     )
 
-    # Choose monitoring settings based on --change flag
+    # Choose monitoring settings based on --rule / --template / --change flags.
+    # Rules saved with the region apply when no mode flag is given.
+    templates = getattr(args, "template", None) or []
     is_change = getattr(args, "change", False)
-    mode = "change" if is_change else "stable"
+    rule_specs = getattr(args, "rule", None) or []
+    if not (rule_specs or templates or is_change):
+        rule_specs = list(region_cfg.get("rules", []))
+    if rule_specs:
+        mode = "stable"
+    elif templates:
+        mode = "template"
+    else:
+        mode = "change" if is_change else "stable"
     settings = _load_monitor_settings(cfg, mode=mode)
+    match_override = getattr(args, "match_threshold", None)
+    if match_override is not None:
+        settings.match_threshold = float(match_override)
 
     # Allow overriding stableSecondsThreshold on a per-run basis in stability mode
     stable_override = getattr(args, "stable_seconds", None)
     if (not is_change) and (stable_override is not None):
         settings.stable_seconds_threshold = float(stable_override)
+    if getattr(args, "auto_threshold", False):
+        settings.auto_threshold = True
+
+    rules = []
+    if rule_specs:
+        from task_completion_detector.pipeline import parse_rule
+
+        # "change" conditions use the change mode threshold unless the rule sets one
+        change_threshold = _load_monitor_settings(cfg, mode="change").difference_threshold
+        try:
+            rules = [
+                parse_rule(spec, settings.stable_seconds_threshold, change_threshold) for spec in rule_specs
+            ]
+        except ValueError as exc:
+            print(f"Invalid rule: {exc}")
+            sys.exit(1)
 
-    monitor = RegionMonitor(args.name, region, settings, config_loader)
+    if getattr(args, "record_trace", None):
+        # Traces hold difference scores; template matching alone produces none.
+        uses_difference = any(word in spec.lower() for spec in rule_specs for word in ("stable", "change"))
+        if mode == "template" or (rule_specs and not uses_difference):
+            print("--record-trace needs stability or change detection; template matching records no trace.")
+            sys.exit(1)
 
-    # Choose monitoring mode based on --change flag
-    if is_change:
+    matcher = None
+    if templates:
+        from task_completion_detector.template_matcher import TemplateMatcher
+
+        try:
+            matcher = TemplateMatcher(templates)
+        except (OSError, ValueError) as exc:
+            print(f"Could not load templates: {exc}")
+            sys.exit(1)
+
+    monitor = RegionMonitor(
+        args.name,
+        region,
+        settings,
+        config_loader,
+        trace_path=getattr(args, "record_trace", None),
+    )
+
+    # Choose monitoring mode based on --rule / --template / --change flags
+    if rules:
+        if matcher is None and any("template" in spec.lower() for spec in rule_specs):
+            print("Rules using 'template' require at least one --template image.")
+            sys.exit(1)
+        monitor.monitor_rules(rules, matcher)
+    elif matcher is not None:
+        monitor.monitor_until_template(matcher)
+    elif is_change:
         monitor.monitor_until_change()
     else:
         monitor.monitor_until_stable()
 
 
+def cmd_discover_regions(args: argparse.Namespace) -> None:
+    """Sample the screen, find the areas that actually change and save tight regions.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI args with sampling options and the name prefix.
+    """
+    from task_completion_detector.models import Region
+    from task_completion_detector.region_discovery import RegionDiscovery
+
+    config_loader = ConfigLoader()
+    area = None
+    if args.within:
+        try:
+            area_cfg = config_loader.get_region(args.within)
+        except KeyError as exc:
+            print(exc.args[0])
+            sys.exit(1)
+        area = Region(
+            x=int(area_cfg["x"]),
+            y=int(area_cfg["y"]),
+            width=int(area_cfg["width"]),
+            height=int(area_cfg["height"]),
+        )
+
+    discovery = RegionDiscovery(
+        area=area,
+        block_size=args.block_size,
+        pixel_scale=args.pixel_scale,
+    )
+    where = f"region '{args.within}'" if area is not None else "the full screen"
+    print(f"Sampling {where} for {args.seconds:g}s at interval {args.interval:g}s. Keep your tasks running...")
+    try:
+        discovery.sample(args.seconds, interval_seconds=args.interval)
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+
+    hotspots = discovery.propose(
+        min_activity=args.min_activity,
+        max_regions=args.max_regions,
+    )
+    if not hotspots:
+        print("No activity detected. Try a longer --seconds or a lower --min-activity.")
+        sys.exit(1)
+
+    for index, hotspot in enumerate(hotspots):
+        region = hotspot.region
+        name = args.name if index == 0 else f"{args.name}-{index + 1}"
+        print(
+            f"{name}: x={region.x}, y={region.y}, width={region.width}, height={region.height} "
+            f"(active {hotspot.activity:.0%} of the time)"
+        )
+        if not args.dry_run:
+            config_loader.save_region(
+                name,
+                {"x": region.x, "y": region.y, "width": region.width, "height": region.height},
+            )
+    if not args.dry_run:
+        print(f"Saved {len(hotspots)} region(s). Watch one with: python main.py monitor --name {args.name}")
+
+
+def cmd_drain_outbox(args: argparse.Namespace) -> None:
+    """Deliver notifications that are still queued in the outbox (e.g. after an outage).
+
+    Args:
+        args (argparse.Namespace): Parsed CLI args with the timeout.
+    """
+    from task_completion_detector.notifications import NotificationDispatcher
+
+    dispatcher = NotificationDispatcher(ConfigLoader())
+    if not dispatcher.has_outbox:
+        print("The notification outbox is disabled or no notification channel is enabled.")
+        return
+    pending = dispatcher.pending_notifications()
+    print(f"{pending} notification(s) pending.")
+    if pending:
+        if dispatcher.flush(args.timeout):
+            print("All notifications delivered.")
+        else:
+            print(f"{dispatcher.pending_notifications()} notification(s) still pending; they will be retried later.")
+    dispatcher.close()
+
+
+def cmd_soak(args: argparse.Namespace) -> None:
+    """Run a monitor through synthetic frames and fail if memory keeps growing.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI args with frame count, frame size, mode and limits.
+    """
+    import json
+    import os
+    import shutil
+    import tempfile
+
+    from task_completion_detector.models import Region
+    from task_completion_detector.soak import SyntheticFrames, run_soak
+
+    cfg = ConfigLoader().load()
+    mode = "change" if args.change else "stable"
+    settings = _load_monitor_settings(cfg, mode=mode)
+    settings.auto_threshold = args.auto_threshold
+    try:
+        width, height = (int(value) for value in args.size.lower().split("x"))
+    except ValueError:
+        print(f"Invalid --size '{args.size}', expected WIDTHxHEIGHT.")
+        sys.exit(1)
+
+    rules = []
+    if args.rule:
+        from task_completion_detector.pipeline import parse_rule
+
+        change_threshold = _load_monitor_settings(cfg, mode="change").difference_threshold
+        try:
+            rules = [parse_rule(spec, settings.stable_seconds_threshold, change_threshold) for spec in args.rule]
+        except ValueError as exc:
+            print(f"Invalid rule: {exc}")
+            sys.exit(1)
+        if any("template" in spec.lower() for spec in args.rule):
+            print("Template rules are not supported by the soak test.")
+            sys.exit(1)
+
+    # Stay quiet long enough for stability to fire before the next busy phase
+    quiet_frames = args.quiet_frames
+    if quiet_frames is None:
+        quiet_frames = int(settings.stable_seconds_threshold / max(settings.interval_seconds, 0.001)) + 5
+    frames = SyntheticFrames(width, height, busy_frames=args.busy_frames, quiet_frames=quiet_frames, raw=args.raw)
+
+    # The monitor runs against a throwaway copy of the config, so the synthetic region and
+    # its learned thresholds (and any outbox) never end up next to the real config.
+    scratch_dir = tempfile.mkdtemp(prefix="tcd-soak-")
+    try:
+        os.makedirs(os.path.join(scratch_dir, "config"))
+        scratch_cfg = {key: value for key, value in cfg.items() if key != "regions"}
+        with open(os.path.join(scratch_dir, "config", "config.txt"), "w", encoding="utf-8") as f:
+            json.dump(scratch_cfg, f, indent=2)
+        monitor = RegionMonitor("soak", Region(0, 0, width, height), settings, ConfigLoader(scratch_dir), capture=frames)
+
+        print(f"Soak test: {args.frames} frames of {width}x{height} in {'rule' if rules else mode} mode...")
+        with _profiled(args):
+            result = run_soak(
+                monitor,
+                args.frames,
+                mode=mode,
+                rules=rules or None,
+                warmup_frames=args.warmup,
+                max_rss_growth_mb=args.max_rss_growth_mb,
+                max_traced_growth_kb=args.max_traced_growth_kb,
+                max_block_growth=args.max_block_growth,
+            )
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    rss = f"{result.rss_growth_bytes / 1e6:+.1f} MB" if result.rss_growth_bytes is not None else "n/a"
+    print(
+        f"{result.frames} frames in {result.seconds:.1f}s ({result.frames / max(result.seconds, 1e-9):.0f} frames/s), "
+        f"{result.events} events; RSS {rss}, traced {result.traced_growth_bytes / 1e3:+.1f} kB, "
+        f"live allocations {result.block_growth:+d}"
+    )
+    if not result.passed:
+        for failure in result.failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("PASS: memory stayed flat.")
+
+
+def cmd_collector(args: argparse.Namespace) -> None:
+    """Run the central collector that notifies for every forwarding host.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI args with listen address and port.
+    """
+    from task_completion_detector.collector import EventCollector
+    from task_completion_detector.notifications import NotificationDispatcher
+
+    config_loader = ConfigLoader()
+    collector_cfg = config_loader.load().get("collector", {})
+    host = args.host or collector_cfg.get("host", "127.0.0.1")
+    port = args.port if args.port is not None else int(collector_cfg.get("port", 8765))
+
+    # The collector notifies itself; it must never forward to another collector.
+    dispatcher = NotificationDispatcher(config_loader, forward=False)
+    collector = EventCollector(dispatcher)
+    try:
+        server = collector.make_server(host, port, token=collector_cfg.get("token") or None)
+    except ValueError as exc:
+        print(f"{exc} Without one, only --host 127.0.0.1 is allowed.")
+        dispatcher.close()
+        sys.exit(1)
+    print(f"Collecting events on http://{host}:{port}/events (status: /status). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def cmd_save_template(args: argparse.Namespace) -> None:
+    """Capture a saved region as a template image for 'monitor --template'.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI args with the region name and output path.
+    """
+    from PIL import ImageGrab
+
+    config_loader = ConfigLoader()
+    try:
+        region_cfg = config_loader.get_region(args.name)
+    except KeyError as exc:
+        print(exc.args[0])
+        sys.exit(1)
+
+    x, y = int(region_cfg["x"]), int(region_cfg["y"])
+    bbox = (x, y, x + int(region_cfg["width"]), y + int(region_cfg["height"]))
+    ImageGrab.grab(bbox=bbox).save(args.output)
+    print(f"Saved template of region '{args.name}' to {args.output}")
+    print(f"Watch for it with: python main.py monitor --name <region> --template {args.output}")
+
+
+def _parse_grid(spec: str) -> List[float]:
+    """Parse a grid spec: either 'start:stop:step' (inclusive) or a comma separated list."""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"Grid step must be positive: {spec}")
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 6) for i in range(max(count, 0))]
+    return [float(part) for part in spec.split(",") if part.strip()]
+
+
+def cmd_tune(args: argparse.Namespace) -> None:
+    """Replay recorded score traces and grid-search stability thresholds.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI args with trace files and grid specs.
+    """
+    from task_completion_detector.score_trace import read_score_trace
+    from task_completion_detector.threshold_tuner import evaluate_stable_grid
+
+    grids = []
+    for option, spec in (("--stable-seconds", args.stable_seconds), ("--diff-thresholds", args.diff_thresholds)):
+        try:
+            grid = _parse_grid(spec)
+        except ValueError:
+            grid = []
+        if not grid:
+            print(f"Invalid {option} '{spec}', expected 'start:stop:step' with a positive step or a comma separated list.")
+            sys.exit(1)
+        grids.append(grid)
+    stable_grid, diff_grid = grids
+
+    traces = []
+    for spec in args.traces:
+        # 'path:SECONDS' overrides the completion time (seconds after the first tick)
+        path, done_offset = spec, None
+        head, sep, tail = spec.rpartition(":")
+        if sep:
+            try:
+                path, done_offset = head, float(tail)
+            except ValueError:
+                path, done_offset = spec, None
+
+        try:
+            trace = read_score_trace(path)
+        except (OSError, ValueError) as exc:
+            print(f"Skipping {path}: {exc}")
+            continue
+        if trace.mode != "stable":
+            print(f"Skipping {path}: recorded in change mode; only stability mode can be tuned.")
+            continue
+        if len(trace.timestamps) == 0:
+            print(f"Skipping {path}: trace contains no ticks.")
+            continue
+        if done_offset is not None:
+            trace.done_at = float(trace.timestamps[0]) + done_offset
+        if trace.done_at is None:
+            print(f"Skipping {path}: no completion time recorded; pass it as '{path}:SECONDS'.")
+            continue
+        if done_offset is None:
+            print(
+                f"{path}: using the completion time detected while recording; results measure agreement with "
+                f"that run's thresholds. Pass the real completion time as '{path}:SECONDS' where you know it."
+            )
+        traces.append(trace)
+
+    if not traces:
+        print("No usable traces.")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    results = evaluate_stable_grid(traces, stable_grid, diff_grid, limit=args.top)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Evaluated {len(stable_grid) * len(diff_grid)} combinations on {len(traces)} trace(s) "
+        f"in {elapsed:.2f}s."
+    )
+    print(f"{'stableSeconds':>14} {'diffThreshold':>14} {'falsePositives':>15} {'meanLatency':>12} {'maxLatency':>11}")
+    for result in results:
+        print(
+            f"{result.stable_seconds:>14g} {result.difference_threshold:>14g} "
+            f"{result.false_positive_rate:>14.0%} {result.mean_latency:>11.1f}s {result.max_latency:>10.1f}s"
+        )
+
+
 def cmd_setup_config(_args: argparse.Namespace) -> None:
     """Run the guided configuration setup."""
     from task_completion_detector.config_setup import run_interactive
@@ -132,6 +603,17 @@ def cmd_setup_config(_args: argparse.Namespace) -> None:
     run_interactive()
 
 
+def _add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="DIR",
+        help="Periodically write sampling profiles and tracemalloc snapshots to DIR",
+    )
+    parser.add_argument("--profile-interval", type=float, default=60.0, help="Seconds between profile reports")
+    parser.add_argument("--profile-keep", type=int, default=10, help="Number of reports of each kind to keep")
+
+
 def main() -> None:
     """Entry point for the Task Completion Detector CLI."""
     parser = argparse.ArgumentParser(description="Task Completion Detector CLI")
@@ -148,7 +630,30 @@ def main() -> None:
     p_select.set_defaults(func=cmd_select_region)
 
     p_monitor = subparsers.add_parser("monitor", help="Monitor a previously defined region")
-    p_monitor.add_argument("--name", required=True, help="Name of the region to monitor")
+    p_monitor.add_argument("--name", default=None, help="Name of the region to monitor")
+    p_monitor.add_argument(
+        "--file",
+        default=None,
+        metavar="PATH",
+        help="Watch the output of a log file instead of a screen region",
+    )
+    p_monitor.add_argument(
+        "--pid",
+        type=int,
+        default=None,
+        help="Watch a process tree instead of a screen region (notify when CPU and I/O go idle)",
+    )
+    p_monitor.add_argument(
+        "--exit",
+        action="store_true",
+        help="With --pid: notify only when the process exits",
+    )
+    p_monitor.add_argument(
+        "--pattern",
+        default=None,
+        metavar="REGEX",
+        help="With --file: notify as soon as a line matches this regular expression",
+    )
     p_monitor.add_argument(
         "--change",
         action="store_true",
@@ -160,8 +665,136 @@ def main() -> None:
         default=None,
         help="Override stableSecondsThreshold for this run (stability mode only)",
     )
+    p_monitor.add_argument(
+        "--auto-threshold",
+        action="store_true",
+        help="Learn differenceThreshold from the region's noise floor (saved per region)",
+    )
+    p_monitor.add_argument(
+        "--template",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Notify when this template image appears in the region (repeatable; enables template mode)",
+    )
+    p_monitor.add_argument(
+        "--match-threshold",
+        type=float,
+        default=None,
+        help="Override matchThreshold (normalized cross-correlation, 0..1) for template mode",
+    )
+    p_monitor.add_argument(
+        "--rule",
+        action="append",
+        default=[],
+        metavar="RULE",
+        help="Notify when a composite rule holds, e.g. 'change then stable:20' or 'stable:30 and template' "
+        "(repeatable; overrides the region's saved rules)",
+    )
+    p_monitor.add_argument(
+        "--record-trace",
+        default=None,
+        metavar="PATH",
+        help="Record a per-tick score trace to PATH for offline tuning with 'tune'",
+    )
+    _add_profile_arguments(p_monitor)
     p_monitor.set_defaults(func=cmd_monitor)
 
+    p_discover = subparsers.add_parser(
+        "discover-regions", help="Find the screen areas that actually change and save tight regions"
+    )
+    p_discover.add_argument("--name", default="hotspot", help="Name of the most active region (others get -2, -3, ...)")
+    p_discover.add_argument("--seconds", type=float, default=60.0, help="How long to sample the screen")
+    p_discover.add_argument("--interval", type=float, default=1.0, help="Seconds between samples")
+    p_discover.add_argument("--within", default=None, help="Only sample inside this saved region")
+    p_discover.add_argument("--block-size", type=int, default=16, help="Heatmap block size in pixels")
+    p_discover.add_argument(
+        "--min-activity",
+        type=float,
+        default=0.05,
+        help="Fraction of samples a block must change in to count as active",
+    )
+    p_discover.add_argument("--max-regions", type=int, default=3, help="Maximum number of regions to propose")
+    p_discover.add_argument(
+        "--pixel-scale",
+        type=float,
+        default=None,
+        help="Captured pixels per screen point for full-screen sampling (e.g. 2 on Retina displays)",
+    )
+    p_discover.add_argument("--dry-run", action="store_true", help="Only print the proposals, do not save them")
+    p_discover.set_defaults(func=cmd_discover_regions)
+
+    p_template = subparsers.add_parser(
+        "save-template", help="Capture a saved region as a template image for template mode"
+    )
+    p_template.add_argument("--name", required=True, help="Name of the region to capture")
+    p_template.add_argument("--output", required=True, help="Path of the PNG file to write")
+    p_template.set_defaults(func=cmd_save_template)
+
+    p_tune = subparsers.add_parser(
+        "tune",
+        help="Replay recorded score traces and grid-search stability thresholds",
+        description="Replay recorded score traces and grid-search stability thresholds. Unless a trace is "
+        "given as 'PATH:SECONDS', its completion time is the one the recording watch detected itself (when "
+        "its quiet period started), so the results only show agreement with the thresholds used while "
+        "recording, not with when the task really finished.",
+    )
+    p_tune.add_argument(
+        "traces",
+        nargs="+",
+        help="Trace files from 'monitor --record-trace'; append ':SECONDS' to set the real completion time",
+    )
+    p_tune.add_argument(
+        "--stable-seconds",
+        default="5:120:5",
+        help="stableSecondsThreshold candidates as 'start:stop:step' or a comma separated list",
+    )
+    p_tune.add_argument(
+        "--diff-thresholds",
+        default="0.1:10:0.1",
+        help="differenceThreshold candidates as 'start:stop:step' or a comma separated list",
+    )
+    p_tune.add_argument("--top", type=int, default=15, help="Number of best combinations to print")
+    p_tune.set_defaults(func=cmd_tune)
+
+    p_drain = subparsers.add_parser("drain-outbox", help="Deliver notifications still queued in the outbox")
+    p_drain.add_argument("--timeout", type=float, default=60.0, help="Seconds to keep retrying before giving up")
+    p_drain.set_defaults(func=cmd_drain_outbox)
+
+    p_collector = subparsers.add_parser(
+        "collector", help="Receive events forwarded by other hosts and send the notifications centrally"
+    )
+    p_collector.add_argument("--host", default=None, help="Address to listen on (default: collector.host or 127.0.0.1)")
+    p_collector.add_argument("--port", type=int, default=None, help="Port to listen on (default: collector.port or 8765)")
+    p_collector.set_defaults(func=cmd_collector)
+
+    p_soak = subparsers.add_parser(
+        "soak", help="Run a monitor through synthetic frames and check that memory stays flat"
+    )
+    p_soak.add_argument("--frames", type=int, default=1_000_000, help="Number of frames after the warmup")
+    p_soak.add_argument("--warmup", type=int, default=1000, help="Frames to run before taking the baseline")
+    p_soak.add_argument("--size", default="320x200", metavar="WxH", help="Synthetic frame size")
+    p_soak.add_argument("--change", action="store_true", help="Soak change mode instead of stability mode")
+    p_soak.add_argument("--rule", action="append", default=[], metavar="RULE", help="Soak a composite rule (repeatable)")
+    p_soak.add_argument("--auto-threshold", action="store_true", help="Exercise the noise floor estimator")
+    p_soak.add_argument(
+        "--raw",
+        action="store_true",
+        help="Feed frames through one reused BGRX buffer like the XShm capture backend",
+    )
+    p_soak.add_argument("--busy-frames", type=int, default=5, help="Changing frames per scenario cycle")
+    p_soak.add_argument(
+        "--quiet-frames",
+        type=int,
+        default=None,
+        help="Unchanged frames per scenario cycle (default: enough for stability to fire)",
+    )
+    p_soak.add_argument("--max-rss-growth-mb", type=float, default=16.0, help="Allowed RSS growth")
+    p_soak.add_argument("--max-traced-growth-kb", type=float, default=256.0, help="Allowed tracemalloc growth")
+    p_soak.add_argument("--max-block-growth", type=int, default=2000, help="Allowed growth of live allocations")
+    _add_profile_arguments(p_soak)
+    p_soak.set_defaults(func=cmd_soak)
+
     p_setup = subparsers.add_parser("setup-config", help="Guided setup for configuration file")
     p_setup.set_defaults(func=cmd_setup_config)
 
@@ -0,0 +1,191 @@
+import base64
+import hmac
+import ipaddress
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .notifications import NotificationDispatcher
+
+
+class EventCollector:
+    """Receive events forwarded by many hosts and notify for all of them.
+
+    Hosts with ``forwarder.enabled`` POST batches of compact events (host,
+    source, state, scores, optional JPEG thumbnail) to ``/events``. Events are
+    deduplicated by their key (retried batches are therefore harmless) and
+    handed to one NotificationDispatcher; its outbox coalesces simultaneous
+    events from different hosts into one message or album and rate limits
+    every channel. ``/status`` reports the hosts seen so far.
+    """
+
+    def __init__(self, dispatcher: NotificationDispatcher, dedupe_size: int = 10000) -> None:
+        self._dispatcher = dispatcher
+        self._dedupe_size = dedupe_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def accept(self, events: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Deduplicate and dispatch a batch of events.
+
+        A key only counts as seen once its event was dispatched, so the
+        forwarder's retry of a batch that failed here is not dropped as a
+        duplicate.
+
+        Returns:
+            Tuple[int, int]: Number of accepted and of duplicate events.
+
+        Raises:
+            Exception: Whatever dispatching raised; the events before it were accepted.
+        """
+        accepted = duplicates = 0
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            key = str(event.get("key") or "")
+            host = str(event.get("host") or "unknown")
+            with self._lock:
+                if key and key in self._seen:
+                    duplicates += 1
+                    continue
+            self._dispatch(host, key, event)
+            with self._lock:
+                if key:
+                    self._seen[key] = None
+                    while len(self._seen) > self._dedupe_size:
+                        self._seen.popitem(last=False)
+                stats = self._hosts.setdefault(host, {"events": 0})
+                stats.update(
+                    events=stats["events"] + 1,
+                    lastSeen=time.time(),
+                    lastSource=event.get("source"),
+                    lastState=event.get("state"),
+                )
+            accepted += 1
+        return accepted, duplicates
+
+    def _dispatch(self, host: str, key: str, event: Dict[str, Any]) -> None:
+        image = None
+        thumbnail = event.get("thumbnail")
+        if thumbnail:
+            try:
+                image = Image.open(BytesIO(base64.b64decode(thumbnail)))
+                image.load()
+            except Exception:
+                image = None
+        message = str(event.get("message") or f"{event.get('source', 'watch')} is {event.get('state', 'done')}")
+        subject = str(event.get("subject") or "Task completion detected")
+        self._dispatcher.send(
+            f"[{host}] {message}",
+            subject=f"[{host}] {subject}",
+            image=image,
+            # The outbox also remembers delivered keys, so duplicates stay suppressed across restarts.
+            key=f"collector:{key}" if key else None,
+            tag=f"{host}:{event.get('source')}",
+        )
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hosts": {host: dict(stats) for host, stats in self._hosts.items()},
+                "pending": self._dispatcher.pending_notifications(),
+            }
+
+    def make_server(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        token: Optional[str] = None,
+        max_body_bytes: int = 16 * 1024 * 1024,
+    ) -> ThreadingHTTPServer:
+        """Create (but do not start) the HTTP server for this collector.
+
+        Raises:
+            ValueError: If ``host`` is reachable from other machines but no token is set;
+                anyone on the network could otherwise send notifications through it.
+        """
+        if not token and not is_loopback(host):
+            raise ValueError(f"Listening on {host} requires a token (collector.token).")
+        return ThreadingHTTPServer((host, port), _handler_for(self, token, max_body_bytes))
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a listen address is only reachable from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _handler_for(collector: EventCollector, token: Optional[str], max_body_bytes: int):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so forwarders reuse their pooled connection
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, code: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            if not token:
+                return True
+            # Constant-time comparison, so response timing does not leak the token.
+            supplied = self.headers.get("Authorization", "").encode("utf-8", "surrogateescape")
+            return hmac.compare_digest(supplied, f"Bearer {token}".encode("utf-8"))
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if self.path.rstrip("/") != "/events":
+                self.rfile.read(length)
+                self._reply(404, {"error": "not found"})
+                return
+            if not self._authorized():
+                self.rfile.read(length)
+                self._reply(401, {"error": "unauthorized"})
+                return
+            if length > max_body_bytes:
+                self.close_connection = True
+                self._reply(413, {"error": "batch too large"})
+                return
+            try:
+                events = json.loads(self.rfile.read(length))["events"]
+                if not isinstance(events, list):
+                    raise ValueError("events must be a list")
+            except (ValueError, KeyError, TypeError) as exc:
+                self._reply(400, {"error": f"invalid batch: {exc}"})
+                return
+            try:
+                accepted, duplicates = collector.accept(events)
+            except Exception as exc:
+                # The forwarder retries the batch; events dispatched before the failure are duplicates then.
+                self._reply(503, {"error": f"dispatch failed: {exc}"})
+                return
+            self._reply(200, {"accepted": accepted, "duplicates": duplicates})
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") != "/status":
+                self._reply(404, {"error": "not found"})
+                return
+            if not self._authorized():
+                self._reply(401, {"error": "unauthorized"})
+                return
+            self._reply(200, collector.status())
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # Keep the console for notifications; errors are answered to the forwarder.
+            pass
+
+    return Handler
@@ -17,6 +17,11 @@ class ConfigLoader:
         self._config_path = os.path.join(self._base_dir, "config", "config.txt")
         self._config: Optional[Dict[str, Any]] = None
 
+    @property
+    def config_dir(self) -> str:
+        """Directory holding config.txt (also used for local state such as the notification outbox)."""
+        return os.path.dirname(self._config_path)
+
     def load(self) -> Dict[str, Any]:
         if self._config is None:
             if not os.path.exists(self._config_path):
@@ -16,6 +16,21 @@ DEFAULT_MONITOR_CHANGE = {
     "differenceThreshold": 10.0,
 }
 
+DEFAULT_MONITOR_TEMPLATE = {
+    # Template mode watches small indicators, so it can afford a faster interval.
+    "intervalSeconds": 0.5,
+    "matchThreshold": 0.9,
+}
+
+DEFAULT_TIMELAPSE = {
+    "minutes": 5.0,
+    "frameIntervalSeconds": 5.0,
+    "maxWidth": 480,
+    # Stay well below Telegram's bot upload limits
+    "maxBytes": 5_000_000,
+    "frameDurationMs": 200,
+}
+
 
 def _yes_no(prompt: str, default: bool) -> bool:
     suffix = "[Y/n]" if default else "[y/N]"
@@ -105,6 +120,17 @@ def _build_config_interactive(existing: Dict[str, Any]) -> Dict[str, Any]:
             ),
         }
 
+    # Self-calibrating thresholds (applies to both modes)
+    auto_threshold = _yes_no(
+        "Learn differenceThreshold automatically from each region's noise floor?",
+        default=bool(existing_monitor.get("autoThreshold", False)),
+    )
+    for section, existing_section in ((monitor, existing_monitor), (monitor_change, existing_change)):
+        section["autoThreshold"] = bool(auto_threshold)
+        section["calibrationSeconds"] = float(existing_section.get("calibrationSeconds", 30.0))
+        section["thresholdSigma"] = float(existing_section.get("thresholdSigma", 4.0))
+    monitor["captureBackend"] = str(existing_monitor.get("captureBackend", "auto"))
+
     # Notifications
     print("\nNotification channels:")
     existing_notifications = existing.get("notifications", {})
@@ -136,6 +162,15 @@ def _build_config_interactive(existing: Dict[str, Any]) -> Dict[str, Any]:
             default=include_screenshot_telegram,
         )
 
+    include_timelapse_telegram = bool(
+        existing_notifications.get("includeTimelapseInTelegram", False)
+    )
+    if enable_telegram:
+        include_timelapse_telegram = _yes_no(
+            "Include a timelapse animation of the last minutes in Telegram notifications?",
+            default=include_timelapse_telegram,
+        )
+
     telegram = existing.get("telegram", {}) if enable_telegram else {}
     email = existing.get("email", {}) if enable_email else {}
 
@@ -192,19 +227,28 @@ def _build_config_interactive(existing: Dict[str, Any]) -> Dict[str, Any]:
         "useEmail": bool(enable_email),
         "useLocalNotifications": bool(enable_local),
         "includeScreenshotInTelegram": bool(include_screenshot_telegram),
+        "includeTimelapseInTelegram": bool(include_timelapse_telegram),
     }
 
+    timelapse = dict(DEFAULT_TIMELAPSE)
+    timelapse.update(existing.get("timelapse", {}))
+
     # Preserve any existing regions
     regions = existing.get("regions", {})
 
     cfg: Dict[str, Any] = {
         "monitor": monitor,
         "monitorChange": monitor_change,
+        "monitorTemplate": dict(existing.get("monitorTemplate", DEFAULT_MONITOR_TEMPLATE)),
         "telegram": telegram,
         "email": email,
         "notifications": notifications,
+        "timelapse": timelapse,
         "regions": regions,
     }
+    # Keep sections the wizard does not manage
+    for key, value in existing.items():
+        cfg.setdefault(key, value)
     return cfg
 
 
@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class MonitorEvent:
+    region: str
+    timestamp: float  # wall clock (time.time())
+
+
+@dataclass
+class TickEvent(MonitorEvent):
+    """One capture was scored (difference score, or match score in template mode)."""
+
+    score: float
+    threshold: float
+    scores: Dict[str, float] = field(default_factory=dict)  # every score computed this tick, by kind
+
+
+@dataclass
+class BusyEvent(MonitorEvent):
+    """Stability mode: activity started (again) after a quiet phase."""
+
+    score: float
+
+
+@dataclass
+class StableEvent(MonitorEvent):
+    """Stability mode: the region has been quiet for the configured duration."""
+
+    stable_seconds: float
+    threshold: float
+    image: Any = None
+
+
+@dataclass
+class ChangedEvent(MonitorEvent):
+    """Change mode: the region differs from its reference image."""
+
+    score: float
+    threshold: float
+    before_image: Any = None
+    after_image: Any = None
+
+
+@dataclass
+class TemplateFoundEvent(MonitorEvent):
+    """Template mode: one of the templates appeared in the region."""
+
+    score: float
+    template: Optional[str]
+    x: int
+    y: int
+    image: Any = None
+
+
+@dataclass
+class RuleFiredEvent(MonitorEvent):
+    """Rule mode: a composite rule (e.g. "change then stable:20") started to hold."""
+
+    rule: str
+    image: Any = None
+    scores: Dict[str, float] = field(default_factory=dict)
@@ -0,0 +1,119 @@
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+# ITU-R 601-2 luma in 16 bit fixed point, exactly as PIL's convert("L")
+_LUMA_R = np.uint32(19595)
+_LUMA_G = np.uint32(38470)
+_LUMA_B = np.uint32(7471)
+_LUMA_ROUND = np.uint32(0x8000)
+_LUMA_SHIFT = np.uint32(16)
+
+# Masks for summing the bytes of 64 bit words in parallel
+_BYTE_LANES = np.uint64(0x00FF00FF00FF00FF)
+_WORD_LANES = np.uint64(0x0000FFFF0000FFFF)
+_DWORD_LANE = np.uint64(0x00000000FFFFFFFF)
+
+
+def frame_size(source) -> Tuple[int, int]:
+    """(width, height) of a capture: a PIL image or a BGRX pixel array (see screen_capture.py)."""
+    if isinstance(source, np.ndarray):
+        return int(source.shape[1]), int(source.shape[0])
+    return source.size
+
+
+def to_image(source) -> Image.Image:
+    """Return a capture as an independent PIL image.
+
+    BGRX pixel arrays are copied, since capture backends overwrite them on
+    the next grab; PIL images are returned as they are.
+    """
+    if not isinstance(source, np.ndarray):
+        return source
+    # The raw decoder copies into a new image; it needs contiguous rows
+    return Image.frombuffer("RGB", frame_size(source), np.ascontiguousarray(source), "raw", "BGRX", 0, 1)
+
+
+class FrameBuffers:
+    """Preallocated grayscale planes and scratch memory for scoring one region.
+
+    Frames of the detection pipeline take their grayscale plane from this
+    pool instead of allocating a new image every tick. Three planes suffice:
+    the current frame, the previous frame and the reference frame (which can
+    be older than the previous one in change mode). Differences are computed
+    in place into a scratch plane, so steady-state scoring allocates no pixel
+    memory at all.
+    """
+
+    def __init__(self, width: int, height: int, planes: int = 3) -> None:
+        self.size = (width, height)
+        self._planes = [np.zeros((height, width), dtype=np.uint8) for _ in range(planes)]
+        # The difference plane is padded to whole 64 bit words (padding stays zero) for _byte_sum
+        words = -(-width * height // 8)
+        self._diff_bytes = np.zeros(words * 8, dtype=np.uint8)
+        self._diff = self._diff_bytes[: width * height].reshape(height, width)
+        self._diff_words = self._diff_bytes.view(np.uint64)
+        self._lanes = np.zeros(words, dtype=np.uint64)
+        self._lanes_high = np.zeros(words, dtype=np.uint64)
+        self._low = np.zeros((height, width), dtype=np.uint8)
+        self._luma = np.zeros((height, width), dtype=np.uint32)
+        self._channel = np.zeros((height, width), dtype=np.uint32)
+
+    def acquire(self, *in_use: np.ndarray) -> np.ndarray:
+        """Return a plane that none of the given planes is."""
+        for plane in self._planes:
+            if not any(plane is other for other in in_use):
+                return plane
+        raise RuntimeError("All frame buffers are in use.")
+
+    def load_gray(self, source, plane: np.ndarray) -> None:
+        """Convert a capture to grayscale into one of this pool's planes."""
+        if isinstance(source, np.ndarray):
+            # BGRX: same fixed point arithmetic as PIL, all in preallocated buffers.
+            # Widening each channel with copyto first avoids numpy's casting buffers.
+            np.copyto(self._luma, source[:, :, 2])
+            np.multiply(self._luma, _LUMA_R, out=self._luma)
+            for channel, weight in ((1, _LUMA_G), (0, _LUMA_B)):
+                np.copyto(self._channel, source[:, :, channel])
+                np.multiply(self._channel, weight, out=self._channel)
+                np.add(self._luma, self._channel, out=self._luma)
+            np.add(self._luma, _LUMA_ROUND, out=self._luma)
+            np.right_shift(self._luma, _LUMA_SHIFT, out=self._luma)
+            np.copyto(plane, self._luma, casting="unsafe")
+            return
+        # PIL captures are new images every tick anyway; only the BGRX path above is allocation free.
+        gray = source if source.mode == "L" else source.convert("L")
+        np.copyto(plane, np.asarray(gray))
+
+    def difference(self, a: np.ndarray, b: np.ndarray) -> Tuple[float, np.ndarray]:
+        """Mean absolute difference of two planes (0..255).
+
+        Returns:
+            Tuple[float, np.ndarray]: The score and the per-pixel difference,
+            which is only valid until the next call.
+        """
+        np.maximum(a, b, out=self._diff)
+        np.minimum(a, b, out=self._low)
+        np.subtract(self._diff, self._low, out=self._diff)
+        return self._byte_sum() / self._diff.size, self._diff
+
+    def _byte_sum(self) -> float:
+        """Exact sum of the difference plane without a widening (allocating) reduction.
+
+        Adds neighbouring bytes of every 64 bit word into 16, 32 and finally
+        64 bit lanes (at most 8 * 255 per word), then sums the words.
+        """
+        lanes, high = self._lanes, self._lanes_high
+        np.right_shift(self._diff_words, np.uint64(8), out=high)
+        np.bitwise_and(high, _BYTE_LANES, out=high)
+        np.bitwise_and(self._diff_words, _BYTE_LANES, out=lanes)
+        np.add(lanes, high, out=lanes)
+        np.right_shift(lanes, np.uint64(16), out=high)
+        np.bitwise_and(high, _WORD_LANES, out=high)
+        np.bitwise_and(lanes, _WORD_LANES, out=lanes)
+        np.add(lanes, high, out=lanes)
+        np.right_shift(lanes, np.uint64(32), out=high)
+        np.bitwise_and(lanes, _DWORD_LANE, out=lanes)
+        np.add(lanes, high, out=lanes)
+        return float(lanes.sum())
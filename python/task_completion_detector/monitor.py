@@ -1,16 +1,32 @@
-import platform
-import time
+import asyncio
+import math
 from dataclasses import dataclass
-from typing import Optional, TYPE_CHECKING
-
-from PIL import Image, ImageChops, ImageGrab, ImageStat
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING
 
 from .config_loader import ConfigLoader
-from .notifications import EmailNotifier, MacOSNotifier, TelegramNotifier, WindowsNotifier
+from .events import ChangedEvent, MonitorEvent, RuleFiredEvent, StableEvent, TemplateFoundEvent
+from .noise_floor import NoiseFloorEstimator
+from .notifications import NotificationDispatcher
+from .pipeline import (
+    SCORE_PREVIOUS,
+    SCORE_REFERENCE,
+    SCORE_TEMPLATE,
+    ChangedCondition,
+    Condition,
+    DetectionPipeline,
+    Rule,
+    StableCondition,
+    TemplateCondition,
+)
+from .frame_buffers import to_image
+from .score_trace import ScoreTraceWriter
+from .screen_capture import create_capture
+from .timelapse import TimelapseRecorder
 
 if TYPE_CHECKING:
     # Only used for typing; avoid importing Tk-dependent code at runtime
     from .region_selector import Region
+    from .template_matcher import TemplateMatcher
 
 
 @dataclass
@@ -18,6 +34,14 @@ class MonitorSettings:
     interval_seconds: float
     stable_seconds_threshold: float
     difference_threshold: float
+    # Learn difference_threshold from the region's noise floor instead of using it as-is
+    auto_threshold: bool = False
+    calibration_seconds: float = 30.0
+    threshold_sigma: float = 4.0
+    # Minimum normalized cross-correlation for template mode (0..1)
+    match_threshold: float = 0.9
+    # "auto", "xshm" (X11 shared memory, Linux) or "pil" (ImageGrab); see screen_capture.py
+    capture_backend: str = "auto"
 
 
 class RegionMonitor:
@@ -29,49 +53,170 @@ class RegionMonitor:
         region: "Region",
         settings: MonitorSettings,
         config_loader: Optional[ConfigLoader] = None,
+        trace_path: Optional[str] = None,
+        capture: Optional[Callable[[], object]] = None,
     ) -> None:
         self._name = name
         self._region = region
+        # Replaces the screen grab, e.g. with synthetic frames for soak tests
+        self._capture = capture
+        self._screen = None
         self._settings = settings
         self._config_loader = config_loader or ConfigLoader()
+        # Optional per-tick score trace for offline threshold tuning (see `main.py tune`)
+        self._trace_path = trace_path
+        self._trace: Optional[ScoreTraceWriter] = None
+        self._trace_kind: Optional[str] = None
+        # Per-stream threshold state, keyed by pipeline score kind
+        self._thresholds: Dict[str, float] = {}
+        self._estimators: Dict[str, Optional[NoiseFloorEstimator]] = {}
 
         cfg = self._config_loader.load()
-        notify_cfg = cfg.get("notifications", {})
-        self._use_telegram = bool(notify_cfg.get("useTelegram", True))
-        self._use_email = bool(notify_cfg.get("useEmail", False))
-        self._use_local = bool(
-            notify_cfg.get("useLocalNotifications", notify_cfg.get("useMacOS", True))
-        )
-        self._include_screenshot_telegram = bool(
-            notify_cfg.get("includeScreenshotInTelegram", False)
-        )
-
-        self._telegram = TelegramNotifier(self._config_loader) if self._use_telegram else None
-        self._email = EmailNotifier(self._config_loader) if self._use_email else None
-        
-        # Use platform-appropriate local notifier
-        self._local_notifier = None
-        if self._use_local:
-            if platform.system() == "Darwin":
-                self._local_notifier = MacOSNotifier()
-            elif platform.system() == "Windows":
-                self._local_notifier = WindowsNotifier()
+        self._notifier = NotificationDispatcher(self._config_loader)
+        self._use_local = self._notifier.use_local
+
+        # Rolling timelapse, encoded incrementally while monitoring
+        self._timelapse: Optional[TimelapseRecorder] = None
+        if self._notifier.wants_timelapse:
+            timelapse_cfg = cfg.get("timelapse", {})
+            self._timelapse_minutes = float(timelapse_cfg.get("minutes", 5.0))
+            self._timelapse = TimelapseRecorder(
+                window_seconds=self._timelapse_minutes * 60.0,
+                frame_interval_seconds=float(timelapse_cfg.get("frameIntervalSeconds", 5.0)),
+                max_width=int(timelapse_cfg.get("maxWidth", 480)),
+                max_bytes=int(timelapse_cfg.get("maxBytes", 5_000_000)),
+                frame_duration_ms=int(timelapse_cfg.get("frameDurationMs", 200)),
+            )
 
     def _capture_region(self):
-        bbox = (
-            int(self._region.x),
-            int(self._region.y),
-            int(self._region.x + self._region.width),
-            int(self._region.y + self._region.height),
+        """Grab the region: a PIL image or a reused BGRX buffer, depending on the capture backend."""
+        if self._capture is not None:
+            capture = self._capture()
+        else:
+            if self._screen is None:
+                bbox = (
+                    int(self._region.x),
+                    int(self._region.y),
+                    int(self._region.x + self._region.width),
+                    int(self._region.y + self._region.height),
+                )
+                self._screen = create_capture(bbox, self._settings.capture_backend)
+            capture = self._screen.grab()
+        if self._timelapse is not None and self._timelapse.wants_frame():
+            self._timelapse.add_frame(to_image(capture))
+        return capture
+
+    def _close_capture(self) -> None:
+        if self._screen is not None:
+            self._screen.close()
+            self._screen = None
+
+    def _observe_score(self, kind: str, score: float, diff) -> float:
+        """Pipeline score hook: record the trace and return the (possibly learned) threshold."""
+        if kind == SCORE_TEMPLATE:
+            return self._settings.match_threshold
+        mode = "stable" if kind == SCORE_PREVIOUS else "change"
+        if self._trace_kind is None:
+            # The trace records the first difference score kind the rules ask for.
+            self._trace_kind = kind
+            self._open_trace(mode)
+        if self._trace is not None and kind == self._trace_kind:
+            self._trace.write_tick(score, diff)
+
+        threshold = self._thresholds.get(kind, self._settings.difference_threshold)
+        if kind not in self._estimators:
+            self._estimators[kind] = self._create_noise_estimator(mode)
+        estimator = self._estimators[kind]
+        if estimator is not None:
+            threshold = self._adapt_threshold(estimator, score, mode, threshold)
+            self._thresholds[kind] = threshold
+        return threshold
+
+    def _open_trace(self, mode: str) -> None:
+        if self._trace_path and self._trace is None:
+            self._trace = ScoreTraceWriter(self._trace_path, self._settings.interval_seconds, mode=mode)
+            print(f"Recording score trace to {self._trace_path}")
+
+    def _mark_trace_done(self, done_at: Optional[float] = None) -> None:
+        """Mark the detected completion time in the trace."""
+        if self._trace is not None:
+            self._trace.mark_done(done_at)
+
+    def _close_trace(self) -> None:
+        if self._trace is None:
+            return
+        self._trace.close()
+        self._trace = None
+
+    def _create_noise_estimator(self, mode: str) -> Optional[NoiseFloorEstimator]:
+        """Create a noise floor estimator when auto threshold is enabled.
+
+        A noise floor learned in an earlier run of the same region and mode is
+        reused, so the calibration phase only happens once per region.
+        """
+        if not self._settings.auto_threshold:
+            return None
+        learned: dict = {}
+        try:
+            learned = self._config_loader.get_region(self._name).get("learnedThreshold", {}).get(mode, {})
+        except KeyError:
+            pass
+        interval = max(self._settings.interval_seconds, 0.001)
+        return NoiseFloorEstimator(
+            sigma=self._settings.threshold_sigma,
+            calibration_samples=int(math.ceil(self._settings.calibration_seconds / interval)),
+            mean=learned.get("mean"),
+            std=learned.get("std"),
         )
-        return ImageGrab.grab(bbox=bbox)
 
-    @staticmethod
-    def _difference_score(img1, img2) -> float:
-        # Compute mean absolute difference in grayscale.
-        diff = ImageChops.difference(img1.convert("L"), img2.convert("L"))
-        stat = ImageStat.Stat(diff)
-        return float(stat.mean[0])  # 0..255
+    def _adapt_threshold(
+        self,
+        estimator: NoiseFloorEstimator,
+        score: float,
+        mode: str,
+        current_threshold: float,
+    ) -> float:
+        """Feed a score into the estimator and return the threshold to use for it."""
+        was_calibrated = estimator.calibrated
+        learned = estimator.update(score)
+        if learned is None:
+            # Still calibrating: keep the configured threshold.
+            return current_threshold
+        if not was_calibrated:
+            print(
+                f"Calibrated noise floor (mean={estimator.mean:.3f}, std={estimator.std:.3f}); "
+                f"using diff threshold {learned:.3f}."
+            )
+            if not estimator.settled:
+                print(
+                    f"The region was busy for {estimator.active_fraction:.0%} of the calibration; "
+                    "the learned threshold is only saved once quiet ticks confirmed it."
+                )
+            self._save_learned_threshold(mode, estimator)
+        return learned
+
+    def _save_learned_threshold(self, mode: str, estimator: Optional[NoiseFloorEstimator]) -> None:
+        """Persist the learned noise floor for this region via ConfigLoader.save_region."""
+        if estimator is None or not estimator.settled:
+            # Never persist a noise floor that was learned while the region was busy.
+            return
+        try:
+            region_cfg = dict(self._config_loader.get_region(self._name))
+        except KeyError:
+            region_cfg = {
+                "x": self._region.x,
+                "y": self._region.y,
+                "width": self._region.width,
+                "height": self._region.height,
+            }
+        learned = dict(region_cfg.get("learnedThreshold", {}))
+        learned[mode] = estimator.to_dict()
+        region_cfg["learnedThreshold"] = learned
+        try:
+            self._config_loader.save_region(self._name, region_cfg)
+        except OSError:
+            # Persisting is best-effort; monitoring keeps working with the in-memory value.
+            pass
 
     def _send_notifications(
         self,
@@ -80,94 +225,176 @@ class RegionMonitor:
         image=None,
         before_image=None,
         after_image=None,
+        state: str = "done",
+        scores: Optional[Dict[str, float]] = None,
     ) -> None:
-        if self._telegram and self._telegram.is_configured():
-            if getattr(self, "_include_screenshot_telegram", False):
-                send_image = image
-                caption = message
-
-                if before_image is not None or after_image is not None:
-                    if before_image is not None and after_image is not None:
-                        try:
-                            w = before_image.width + after_image.width
-                            h = max(before_image.height, after_image.height)
-                            combined = Image.new("RGB", (w, h))
-                            combined.paste(before_image.convert("RGB"), (0, 0))
-                            combined.paste(after_image.convert("RGB"), (before_image.width, 0))
-                            send_image = combined
-                            caption = f"{message}\n(Left: before, Right: after)"
-                        except Exception:
-                            send_image = after_image or before_image
-                    else:
-                        send_image = after_image or before_image
-
-                if send_image is not None:
-                    self._telegram.send_photo(send_image, caption=caption)
-                else:
-                    self._telegram.send_message(message)
+        animation = self._timelapse.render() if self._timelapse is not None else None
+        self._notifier.send(
+            message,
+            subject=subject,
+            image=image,
+            before_image=before_image,
+            after_image=after_image,
+            animation=animation,
+            animation_caption=(
+                f"Timelapse of the last {self._timelapse_minutes:g} minutes" if animation else None
+            ),
+            # A re-armed watch updates its desktop notification instead of stacking a new one
+            tag=f"region:{self._name}",
+            event={"source": f"region:{self._name}", "state": state, "scores": scores or {}},
+        )
+
+    def _label(self) -> str:
+        return "default region" if self._name in ("default", "windsurf_panel") else f"region '{self._name}'"
+
+    def events(
+        self,
+        mode: str = "stable",
+        matcher: Optional["TemplateMatcher"] = None,
+        rules: Optional[Sequence[Rule]] = None,
+    ) -> AsyncIterator[MonitorEvent]:
+        """Stream typed monitoring events as an async generator.
+
+        Captures and scoring run in the event loop's default executor, so many
+        monitors can share one event loop without a thread per region. The
+        generator only captures the next frame once the consumer asked for the
+        next event, which gives natural backpressure.
+
+        The stream does not stop after a detection: stability mode re-arms once
+        the region gets busy again, change mode adopts the changed image as the
+        new reference, and template mode re-arms once the template disappeared.
+
+        Args:
+            mode (str): "stable", "change" or "template"; ignored when rules are given.
+            matcher (Optional[TemplateMatcher]): Required for template mode and template rules.
+            rules (Optional[Sequence[Rule]]): Composite rules (see pipeline.parse_rule)
+                evaluated on one shared capture per tick.
+
+        Returns:
+            AsyncIterator[MonitorEvent]: TickEvent for every scored capture plus
+            BusyEvent / StableEvent, ChangedEvent, TemplateFoundEvent or RuleFiredEvent.
+        """
+        return self._pipeline_events(self.pipeline(mode, matcher, rules))
+
+    def pipeline(
+        self,
+        mode: str = "stable",
+        matcher: Optional["TemplateMatcher"] = None,
+        rules: Optional[Sequence[Rule]] = None,
+    ) -> DetectionPipeline:
+        """Build the detection pipeline behind ``events`` with fresh threshold state.
+
+        ``events`` runs it on a timer; the soak test (see soak.py) steps it
+        directly as fast as possible. Arguments are the same as for ``events``.
+        """
+        if rules is None:
+            if mode == "stable":
+                condition: Condition = StableCondition(self._settings.stable_seconds_threshold)
+            elif mode == "change":
+                condition = ChangedCondition()
+            elif mode == "template":
+                if matcher is None:
+                    raise ValueError("Template mode requires a TemplateMatcher.")
+                condition = TemplateCondition()
+            else:
+                raise ValueError(f"Unknown monitoring mode: {mode}")
+            rules = [Rule(mode, condition, typed_event=True)]
+
+        self._thresholds = {}
+        self._estimators = {}
+        self._trace_kind = None
+        return DetectionPipeline(
+            self._name,
+            self._capture_region,
+            rules,
+            self._settings.interval_seconds,
+            self._observe_score,
+            matcher=matcher,
+        )
+
+    async def _pipeline_events(self, pipeline: DetectionPipeline) -> AsyncIterator[MonitorEvent]:
+        loop = asyncio.get_running_loop()
+        interval = self._settings.interval_seconds
+        step = None
+        try:
+            while True:
+                # One capture and one scoring pass per tick, shared by every rule. Shielded, so that
+                # the future keeps tracking the executor thread when the consumer cancels.
+                step = loop.run_in_executor(None, pipeline.step)
+                events = await asyncio.shield(step)
+                for event in events:
+                    self._on_detection(event)
+                    yield event
+                await asyncio.sleep(interval)
+        finally:
+            if step is None or step.done():
+                self._close_pipeline()
             else:
-                self._telegram.send_message(message)
-        if self._email and self._email.is_configured():
-            self._email.send_simple_mail(subject, message)
-        if self._local_notifier:
-            self._local_notifier.send_notification(message)
+                # Cancelled mid-step: the executor thread still uses the capture (XShm memory shared with
+                # the X server) and the trace, so they are only closed once it finished.
+                step.add_done_callback(lambda _: self._close_pipeline())
+                await asyncio.wait({step})
+
+    def _close_pipeline(self) -> None:
+        self._close_trace()
+        self._close_capture()
+
+    def _on_detection(self, event: MonitorEvent) -> None:
+        """Persist learned thresholds and mark the trace when something was detected."""
+        if isinstance(event, StableEvent):
+            self._save_learned_threshold("stable", self._estimators.get(SCORE_PREVIOUS))
+            # Activity ended when the quiet period started
+            self._mark_trace_done(event.timestamp - event.stable_seconds)
+        elif isinstance(event, ChangedEvent):
+            self._save_learned_threshold("change", self._estimators.get(SCORE_REFERENCE))
+            # The change first appeared on the first of the two consecutive hits
+            self._mark_trace_done(event.timestamp - self._settings.interval_seconds)
+        elif isinstance(event, RuleFiredEvent):
+            self._save_learned_threshold("stable", self._estimators.get(SCORE_PREVIOUS))
+            self._save_learned_threshold("change", self._estimators.get(SCORE_REFERENCE))
+            self._mark_trace_done(event.timestamp)
+
+    @staticmethod
+    def _first_event(stream: AsyncIterator[MonitorEvent], event_type: type) -> MonitorEvent:
+        """Consume a monitor event stream until the first event of the given type."""
+
+        async def consume() -> MonitorEvent:
+            try:
+                async for event in stream:
+                    if isinstance(event, event_type):
+                        return event
+            finally:
+                await stream.aclose()
+            raise RuntimeError("Monitor event stream ended unexpectedly.")
+
+        return asyncio.run(consume())
 
     def monitor_until_stable(self) -> None:
         interval = self._settings.interval_seconds
         threshold_seconds = self._settings.stable_seconds_threshold
         diff_threshold = self._settings.difference_threshold
 
-        stable_time = 0.0
-        last_image = None
-
-        label = "default region" if self._name in ("default", "windsurf_panel") else f"region '{self._name}'"
         print(
-            f"Monitoring {label} (x={self._region.x}, y={self._region.y}, "
+            f"Monitoring {self._label()} (x={self._region.x}, y={self._region.y}, "
             f"width={self._region.width}, height={self._region.height}) at interval {interval}s, "
-            f"declaring stable after {threshold_seconds}s with diff threshold {diff_threshold}..."
+            f"declaring stable after {threshold_seconds}s with diff threshold {diff_threshold}"
+            + (" (auto-calibrating)..." if self._settings.auto_threshold else "...")
         )
 
-        while True:
-            current = self._capture_region()
-
-            if last_image is not None:
-                score = self._difference_score(last_image, current)
-                # Debug print; later we can gate behind a flag if too noisy.
-                # print(f"diff score: {score}")
+        event = self._first_event(self.events("stable"), StableEvent)
+        stable_time = event.stable_seconds
+        print(
+            f"Selected region stable for {stable_time:.0f}s (score <= {event.threshold:g}). Sending notifications."
+        )
+        message = f"No more activity detected in the selected area for {stable_time:.0f} seconds."
+        self._send_notifications(
+            message,
+            image=event.image,
+            state="stable",
+            scores={"stableSeconds": stable_time, "threshold": event.threshold},
+        )
 
-                if score <= diff_threshold:
-                    stable_time += interval
-                else:
-                    stable_time = 0.0
-
-                if stable_time >= threshold_seconds:
-                    print(
-                        f"Selected region stable for {stable_time:.0f}s (score <= {diff_threshold}). Sending notifications."
-                    )
-                    message = f"No more activity detected in the selected area for {stable_time:.0f} seconds."
-                    self._send_notifications(message, image=current)
-
-                    if self._use_local and platform.system() == "Darwin":
-                        print(
-                            "\nmacOS notification hint:"\
-                            "\n- If you did not see the popup, open the Notification Center (top-right) and look for 'Task Completion Detector'."\
-                            "\n- For more intrusive alerts, right-click that notification, choose 'Mitteilungs-Einstellungen…' and set for 'Skripteditor' / the notification app:"\
-                            "\n  * Hinweisstil: 'Dauerhaft' (Alerts)"\
-                            "\n  * Schreibtisch / Mitteilungszentrale / Sperrbildschirm: aktiviert"\
-                            "\n  * Ton für Mitteilung wiedergeben: aktiviert"\
-                            "\n  * Vorschauen zeigen: 'Immer'"\
-                            "\n  * Mitteilungsgruppierung: 'Nach App'"
-                        )
-                    elif self._use_local and platform.system() == "Windows":
-                        print(
-                            "\nWindows notification hint:"\
-                            "\n- If you did not see the popup, check the Action Center (Win+A) for 'Task Completion Detector'."\
-                            "\n- For better notifications, install the BurntToast module: Install-Module -Name BurntToast -Scope CurrentUser"
-                        )
-                    break
-
-            last_image = current
-            time.sleep(interval)
+        self._notifier.print_local_hint()
 
     def monitor_until_change(self) -> None:
         """Monitor a region and notify immediately when a change is detected.
@@ -180,51 +407,102 @@ class RegionMonitor:
         interval = self._settings.interval_seconds
         diff_threshold = self._settings.difference_threshold
 
-        label = "default region" if self._name in ("default", "windsurf_panel") else f"region '{self._name}'"
         print(
-            f"Watching {label} (x={self._region.x}, y={self._region.y}, "
+            f"Watching {self._label()} (x={self._region.x}, y={self._region.y}, "
             f"width={self._region.width}, height={self._region.height}) for changes at interval {interval}s, "
-            f"notifying when diff > {diff_threshold}..."
+            f"notifying when diff > {diff_threshold}"
+            + (" (auto-calibrating)..." if self._settings.auto_threshold else "...")
         )
+        print("Capturing reference image and watching for changes...")
 
-        # Capture initial reference image
-        reference_image = self._capture_region()
-        print("Reference image captured. Watching for changes...")
-        required_hits = 2
-        consecutive_hits = 0
+        event = self._first_event(self.events("change"), ChangedEvent)
+        print(
+            f"Change detected! (diff score: {event.score:.2f} > {event.threshold:g}). Sending notifications."
+        )
+        message = f"Change detected in the monitored area! The watched region has changed."
+        self._send_notifications(
+            message,
+            subject="Change detected",
+            before_image=event.before_image,
+            after_image=event.after_image,
+            state="changed",
+            scores={"score": event.score, "threshold": event.threshold},
+        )
+        self._notifier.print_local_hint()
 
-        while True:
-            time.sleep(interval)
-            current = self._capture_region()
+    def monitor_until_template(self, matcher: "TemplateMatcher") -> None:
+        """Monitor a region and notify when one of the given templates appears in it.
 
-            score = self._difference_score(reference_image, current)
+        Unlike monitor_until_change, this knows which state the region moved into:
+        it only fires when a saved "done indicator" (e.g. an idle send button or a
+        green checkmark) is visible, so spinner frames or other unrelated changes
+        do not trigger false alerts.
 
-            if score > diff_threshold:
-                consecutive_hits += 1
-            else:
-                consecutive_hits = 0
+        Args:
+            matcher (TemplateMatcher): Matcher holding the template images.
+        """
+        interval = self._settings.interval_seconds
+        match_threshold = self._settings.match_threshold
 
-            if consecutive_hits >= required_hits:
-                print(
-                    f"Change detected! (diff score: {score:.2f} > {diff_threshold}). Sending notifications."
-                )
-                message = f"Change detected in the monitored area! The watched region has changed."
-                self._send_notifications(
-                    message,
-                    subject="Change detected",
-                    before_image=reference_image,
-                    after_image=current,
-                )
+        print(
+            f"Watching {self._label()} (x={self._region.x}, y={self._region.y}, "
+            f"width={self._region.width}, height={self._region.height}) for {len(matcher)} template(s) "
+            f"at interval {interval}s, notifying when match >= {match_threshold}..."
+        )
 
-                if self._use_local and platform.system() == "Darwin":
-                    print(
-                        "\nmacOS notification hint:"\
-                        "\n- If you did not see the popup, open the Notification Center (top-right) and look for 'Task Completion Detector'."
-                    )
-                elif self._use_local and platform.system() == "Windows":
-                    print(
-                        "\nWindows notification hint:"\
-                        "\n- If you did not see the popup, check the Action Center (Win+A) for 'Task Completion Detector'."\
-                        "\n- For better notifications, install the BurntToast module: Install-Module -Name BurntToast -Scope CurrentUser"
+        event = self._first_event(self.events("template", matcher), TemplateFoundEvent)
+        print(
+            f"Template '{event.template}' found at x={event.x}, y={event.y} "
+            f"(match {event.score:.2f} >= {match_threshold}). Sending notifications."
+        )
+        message = f"Done indicator '{event.template}' appeared in the monitored area."
+        self._send_notifications(
+            message,
+            subject="Done indicator detected",
+            image=event.image,
+            state="template",
+            scores={"match": event.score},
+        )
+        self._notifier.print_local_hint()
+
+    def monitor_rules(self, rules: List[Rule], matcher: Optional["TemplateMatcher"] = None) -> None:
+        """Monitor a region with composite rules and notify whenever one of them fires.
+
+        All rules share one capture and one scoring pass per tick. Monitoring
+        ends once every rule has fired at least once.
+
+        Args:
+            rules (List[Rule]): Rules created with pipeline.parse_rule.
+            matcher (Optional[TemplateMatcher]): Required if a rule uses "template".
+        """
+        interval = self._settings.interval_seconds
+        print(
+            f"Watching {self._label()} (x={self._region.x}, y={self._region.y}, "
+            f"width={self._region.width}, height={self._region.height}) at interval {interval}s "
+            f"for rule(s): " + "; ".join(f"'{rule.name}'" for rule in rules) + "..."
+        )
+
+        async def consume() -> None:
+            pending = {rule.name for rule in rules}
+            stream = self.events(matcher=matcher, rules=rules)
+            try:
+                async for event in stream:
+                    if not isinstance(event, RuleFiredEvent):
+                        continue
+                    print(f"Rule '{event.rule}' matched. Sending notifications.")
+                    message = f"Rule '{event.rule}' matched in the monitored area."
+                    self._send_notifications(
+                        message,
+                        subject="Rule matched",
+                        image=event.image,
+                        state=f"rule:{event.rule}",
+                        scores=event.scores,
                     )
-                break
+                    pending.discard(event.rule)
+                    if not pending:
+                        return
+            finally:
+                await stream.aclose()
+
+        asyncio.run(consume())
+        self._notifier.print_local_hint()
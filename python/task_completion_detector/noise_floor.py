@@ -0,0 +1,140 @@
+import math
+import statistics
+from typing import Any, Dict, List, Optional
+
+# Scales the median absolute deviation to the standard deviation of normally distributed noise
+_MAD_TO_STD = 1.4826
+
+
+class NoiseFloorEstimator:
+    """Learn a difference threshold from the observed noise floor of a region.
+
+    The first ``calibration_samples`` scores are summarized robustly: the
+    noise floor is their median and the spread their scaled median absolute
+    deviation, so busy ticks during calibration (up to half of them) do not
+    become part of the noise floor. Afterwards the mean and variance are
+    tracked with an exponentially weighted moving average, so memory use stays
+    bounded by the calibration window (one float per sample, freed once
+    calibrated) no matter how long the monitor runs.
+
+    Scores at or below the current threshold update the estimate normally.
+    Scores above it are winsorized: clipped to the threshold, they pull the
+    mean up with the much smaller ``drift_alpha`` and leave the variance
+    alone. Real activity therefore barely moves the noise floor, but a noise
+    floor that really rose (a new blinking caret or animation, a different
+    theme, a stale persisted value) is caught up with after a while instead of
+    keeping the region busy forever.
+
+    A noise floor calibrated while the region was busy for more than
+    ``max_active_fraction`` of the window is not ``settled`` (and should not be
+    persisted) until as many quiet ticks as the window had confirmed it.
+
+    The threshold is ``mean + sigma * std``, never lower than ``min_threshold``
+    (a perfectly static region would otherwise react to a single pixel).
+    """
+
+    def __init__(
+        self,
+        sigma: float = 4.0,
+        calibration_samples: int = 30,
+        alpha: float = 0.02,
+        drift_alpha: float = 0.002,
+        min_threshold: float = 0.25,
+        max_active_fraction: float = 0.2,
+        mean: Optional[float] = None,
+        std: Optional[float] = None,
+    ) -> None:
+        self._sigma = float(sigma)
+        self._calibration_samples = max(int(calibration_samples), 2)
+        self._alpha = float(alpha)
+        self._drift_alpha = float(drift_alpha)
+        self._min_threshold = float(min_threshold)
+        self._max_active_fraction = float(max_active_fraction)
+
+        self._samples: List[float] = []
+        self._mean = 0.0
+        self._var = 0.0
+        self._calibrated = False
+        self._active_fraction = 0.0
+        self._quiet_updates = 0
+        if mean is not None and std is not None:
+            # Seed from a previously learned noise floor; no calibration phase needed.
+            self._mean = float(mean)
+            self._var = float(std) ** 2
+            self._calibrated = True
+
+    @property
+    def calibrated(self) -> bool:
+        return self._calibrated
+
+    @property
+    def active_fraction(self) -> float:
+        """Fraction of calibration scores above the calibrated threshold (busy ticks)."""
+        return self._active_fraction
+
+    @property
+    def settled(self) -> bool:
+        """Whether the noise floor was learned from a quiet region and is worth persisting."""
+        if not self._calibrated:
+            return False
+        return self._active_fraction <= self._max_active_fraction or self._quiet_updates >= self._calibration_samples
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(self._var, 0.0))
+
+    @property
+    def threshold(self) -> Optional[float]:
+        """Current learned threshold, or None while still calibrating."""
+        if not self._calibrated:
+            return None
+        return max(self._mean + self._sigma * self.std, self._min_threshold)
+
+    def update(self, score: float) -> Optional[float]:
+        """Feed one difference score and return the current threshold.
+
+        Args:
+            score (float): Difference score of the latest tick.
+
+        Returns:
+            Optional[float]: Learned threshold, or None while still calibrating.
+        """
+        score = float(score)
+        if not self._calibrated:
+            self._samples.append(score)
+            if len(self._samples) >= self._calibration_samples:
+                self._calibrate()
+            return self.threshold
+
+        threshold = self.threshold
+        if score <= threshold:
+            self._quiet_updates += 1
+            delta = score - self._mean
+            self._mean += self._alpha * delta
+            self._var = (1.0 - self._alpha) * (self._var + self._alpha * delta * delta)
+        else:
+            # Winsorized: the threshold rises by at most drift_alpha * (threshold - mean) per busy tick.
+            self._mean += self._drift_alpha * (threshold - self._mean)
+        return self.threshold
+
+    def _calibrate(self) -> None:
+        samples, self._samples = self._samples, []
+        median = statistics.median(samples)
+        mad = statistics.median(abs(sample - median) for sample in samples)
+        self._mean = median
+        self._var = (_MAD_TO_STD * mad) ** 2
+        self._calibrated = True
+        threshold = self.threshold
+        self._active_fraction = sum(1 for sample in samples if sample > threshold) / len(samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the learned noise floor for storage in the region config."""
+        return {
+            "threshold": round(self.threshold or 0.0, 4),
+            "mean": round(self._mean, 4),
+            "std": round(self.std, 4),
+        }
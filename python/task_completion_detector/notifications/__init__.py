@@ -2,10 +2,18 @@ from .telegram_notifier import TelegramNotifier
 from .email_notifier import EmailNotifier
 from .macos_notifier import MacOSNotifier
 from .windows_notifier import WindowsNotifier
+from .linux_notifier import LinuxNotifier
+from .outbox import DeliveryError, NotificationOutbox, OutboxItem
+from .dispatcher import NotificationDispatcher
 
 __all__ = [
     "TelegramNotifier",
     "EmailNotifier",
     "MacOSNotifier",
     "WindowsNotifier",
+    "LinuxNotifier",
+    "DeliveryError",
+    "NotificationOutbox",
+    "OutboxItem",
+    "NotificationDispatcher",
 ]
@@ -0,0 +1,135 @@
+import time
+from typing import List, Tuple
+
+from .outbox import OutboxItem
+
+# Telegram limits
+_MAX_MESSAGE_CHARS = 4096
+_MAX_CAPTION_CHARS = 1024
+_MAX_ALBUM_PHOTOS = 10
+
+
+class TokenBucket:
+    """Allow ``burst`` deliveries at once and ``rate_per_minute`` on average.
+
+    The state can be saved and restored (see ``state``), so that processes
+    sharing one outbox also share one bucket per channel. It is timestamped
+    with the wall clock for that reason.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: float) -> None:
+        self._rate = max(float(rate_per_minute), 0.0) / 60.0
+        self._burst = max(float(burst), 1.0)
+        self._tokens = self._burst
+        self._last = time.time()
+
+    @property
+    def state(self) -> Tuple[float, float]:
+        """Tokens left and the time they were counted."""
+        return self._tokens, self._last
+
+    def restore(self, tokens: float, updated: float) -> None:
+        """Continue from a state saved by this or another process."""
+        self._tokens = min(float(tokens), self._burst)
+        self._last = float(updated)
+
+    def _refill(self) -> None:
+        now = time.time()
+        # max(): a clock that went backwards must not drain the bucket
+        self._tokens = min(self._burst, self._tokens + max(now - self._last, 0.0) * self._rate)
+        self._last = now
+
+    def take(self) -> bool:
+        """Consume one token if available."""
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def wait_seconds(self) -> float:
+        """Seconds until the next token is available."""
+        self._refill()
+        if self._tokens >= 1.0:
+            return 0.0
+        if self._rate <= 0.0:
+            return 60.0
+        return (1.0 - self._tokens) / self._rate
+
+
+def _joined(texts: List[str], limit: int, separator: str = "\n\n") -> str:
+    if len(texts) == 1:
+        return texts[0][:limit]
+    text = f"{len(texts)} notifications:{separator}" + separator.join(texts)
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _merged(items: List[OutboxItem], kind: str, payload: dict, blob=None) -> OutboxItem:
+    key = items[0].key if len(items) == 1 else f"{items[0].key}+{len(items) - 1}"
+    return OutboxItem(
+        key,
+        items[0].channel,
+        kind,
+        payload,
+        blob,
+        attempts=max(item.attempts for item in items),
+        created=min(item.created for item in items),
+    )
+
+
+def merge_notifications(items: List[OutboxItem]) -> List[Tuple[OutboxItem, List[OutboxItem]]]:
+    """Merge the queued items of one channel into as few deliveries as possible.
+
+    Telegram texts become one message and screenshots one photo album (up to
+    10 photos each), emails one mail, local notifications one toast and
+    forwarded events one batch for the collector.
+    Anything else (e.g. timelapse animations) is delivered as is.
+
+    Args:
+        items (List[OutboxItem]): Items of a single channel in queue order.
+
+    Returns:
+        List[Tuple[OutboxItem, List[OutboxItem]]]: Each delivery with the queued items it covers.
+    """
+    if len(items) < 2:
+        return [(item, [item]) for item in items]
+
+    by_kind = {}
+    for item in items:
+        by_kind.setdefault(item.kind, []).append(item)
+
+    deliveries: List[Tuple[OutboxItem, List[OutboxItem]]] = []
+    for kind, group in by_kind.items():
+        if kind == "message":
+            payload = {"text": _joined([item.payload["text"] for item in group], _MAX_MESSAGE_CHARS)}
+            deliveries.append((_merged(group, "message", payload), group))
+        elif kind == "mail":
+            subjects = [item.payload["subject"] for item in group]
+            subject = subjects[0] if len(group) == 1 else f"{len(group)} notifications: {subjects[0]}"
+            body = _joined([item.payload["body"] for item in group], 1_000_000, separator="\n\n---\n\n")
+            deliveries.append((_merged(group, "mail", {"subject": subject, "body": body}), group))
+        elif kind == "notification":
+            tags = {item.payload.get("tag") for item in group}
+            payload = {
+                "text": _joined([item.payload["text"] for item in group], 500, separator="\n"),
+                # Only an update of a single watch may replace its previous notification
+                "tag": tags.pop() if len(tags) == 1 else None,
+            }
+            deliveries.append((_merged(group, "notification", payload), group))
+        elif kind == "photo":
+            for start in range(0, len(group), _MAX_ALBUM_PHOTOS):
+                chunk = group[start : start + _MAX_ALBUM_PHOTOS]
+                if len(chunk) == 1:
+                    deliveries.append((chunk[0], chunk))
+                    continue
+                photos = [{"length": len(item.blob or b"")} for item in chunk]
+                caption = _joined([item.payload.get("caption") or "" for item in chunk], _MAX_CAPTION_CHARS, "\n")
+                blob = b"".join(item.blob or b"" for item in chunk)
+                deliveries.append((_merged(chunk, "album", {"photos": photos, "caption": caption}, blob), chunk))
+        elif kind == "event":
+            # Forwarded events travel to the collector as one batch
+            payload = {"events": [item.payload for item in group]}
+            deliveries.append((_merged(group, "events", payload), group))
+        else:
+            deliveries.extend((item, [item]) for item in group)
+    return deliveries
@@ -0,0 +1,304 @@
+import atexit
+import os
+import platform
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+from ..config_loader import ConfigLoader
+from .email_notifier import EmailNotifier
+from .coalescing import TokenBucket, merge_notifications
+from .forwarder import EventForwarder, encode_thumbnail
+from .linux_notifier import LinuxNotifier
+from .macos_notifier import MacOSNotifier
+from .outbox import NotificationOutbox, OutboxItem, Transport
+from .telegram_notifier import TelegramNotifier, encode_photo
+from .windows_notifier import WindowsNotifier
+
+
+class NotificationDispatcher:
+    """Send a notification through every channel enabled in the config.
+
+    Shared by all monitors (screen regions, text sources, processes) so that
+    they notify through the same Telegram / email / local notifier stack.
+    Network channels go through a durable outbox (see NotificationOutbox), so
+    a notification survives network outages and is never lost because the
+    network was down at the moment a task finished. The outbox also coalesces:
+    notifications from any monitor sharing it (other regions, other processes)
+    that arrive within ``coalescing.windowSeconds`` are merged into one message,
+    mail, toast or photo album, and every channel is rate limited.
+
+    With ``forwarder.enabled``, Telegram and email are not sent from this host;
+    compact events go to a central collector instead, which notifies for all
+    hosts (see collector.py).
+    """
+
+    def __init__(
+        self,
+        config_loader: Optional[ConfigLoader] = None,
+        transport: Optional[Transport] = None,
+        forward: bool = True,
+    ) -> None:
+        """Create the dispatcher.
+
+        Args:
+            config_loader (Optional[ConfigLoader]): Config access.
+            transport (Optional[Transport]): Replaces the real Telegram / email delivery
+                of outbox items, e.g. with a fake for offline testing.
+            forward (bool): Honor the forwarder config; the collector itself passes False.
+        """
+        self._config_loader = config_loader or ConfigLoader()
+
+        cfg = self._config_loader.load()
+        notify_cfg = cfg.get("notifications", {})
+        self._use_telegram = bool(notify_cfg.get("useTelegram", True))
+        self._use_email = bool(notify_cfg.get("useEmail", False))
+        self._use_local = bool(
+            notify_cfg.get("useLocalNotifications", notify_cfg.get("useMacOS", True))
+        )
+        self._include_screenshot_telegram = bool(
+            notify_cfg.get("includeScreenshotInTelegram", False)
+        )
+        self._include_timelapse_telegram = bool(
+            notify_cfg.get("includeTimelapseInTelegram", False)
+        )
+
+        self._forwarder: Optional[EventForwarder] = None
+        forward_cfg = cfg.get("forwarder", {})
+        if forward and bool(forward_cfg.get("enabled", False)) and forward_cfg.get("url"):
+            self._forwarder = EventForwarder(forward_cfg["url"], token=forward_cfg.get("token") or None)
+            self._host = str(forward_cfg.get("host") or socket.gethostname())
+            self._thumbnail_width = int(forward_cfg.get("thumbnailWidth", 320))
+            # The collector owns the Telegram / email credentials and notifies for every host.
+            self._use_telegram = False
+            self._use_email = False
+
+        self._telegram = TelegramNotifier(self._config_loader) if self._use_telegram else None
+        self._email = EmailNotifier(self._config_loader) if self._use_email else None
+
+        # Use platform-appropriate local notifier
+        self._local_notifier = None
+        if self._use_local:
+            if platform.system() == "Darwin":
+                self._local_notifier = MacOSNotifier()
+            elif platform.system() == "Windows":
+                self._local_notifier = WindowsNotifier()
+            elif platform.system() == "Linux":
+                linux_notifier = LinuxNotifier()
+                if linux_notifier.is_available():
+                    self._local_notifier = linux_notifier
+
+        self._outbox: Optional[NotificationOutbox] = None
+        outbox_cfg = cfg.get("outbox", {})
+        channels = (self._telegram, self._email, self._local_notifier, self._forwarder)
+        if bool(outbox_cfg.get("enabled", True)) and any(channel is not None for channel in channels):
+            path = outbox_cfg.get("path") or os.path.join(self._config_loader.config_dir, "outbox.sqlite3")
+            coalescing_cfg = cfg.get("coalescing", {})
+            per_minute = {"telegram": 20.0, "email": 6.0, "local": 12.0}
+            per_minute.update(coalescing_cfg.get("perMinute", {}))
+            burst = float(coalescing_cfg.get("burst", 3))
+            try:
+                self._outbox = NotificationOutbox(
+                    path,
+                    transport or self.deliver,
+                    max_backoff_seconds=float(outbox_cfg.get("maxBackoffSeconds", 300.0)),
+                    max_age_seconds=float(outbox_cfg.get("maxAgeHours", 24.0)) * 3600.0,
+                    window_seconds=float(coalescing_cfg.get("windowSeconds", 2.0)),
+                    merge=merge_notifications,
+                    rate_limits={channel: TokenBucket(rate, burst) for channel, rate in per_minute.items()},
+                    # Rows of channels this process cannot send stay queued for one that can.
+                    channels=None if transport is not None else self._deliverable_channels(),
+                )
+            except (OSError, sqlite3.Error) as exc:
+                print(f"Notification outbox unavailable ({exc}); sending notifications directly.")
+            else:
+                self._outbox.start()
+                # Give queued notifications a chance to go out before the process exits.
+                atexit.register(self._outbox.close, float(outbox_cfg.get("flushTimeoutSeconds", 30.0)))
+
+    def _deliverable_channels(self) -> List[str]:
+        """Outbox channels that deliver() can send with this host's config."""
+        channels = []
+        if self._telegram is not None and self._telegram.is_configured():
+            channels.append("telegram")
+        if self._email is not None and self._email.is_configured():
+            channels.append("email")
+        if self._local_notifier is not None:
+            channels.append("local")
+        if self._forwarder is not None:
+            channels.append("forward")
+        return channels
+
+    @property
+    def use_local(self) -> bool:
+        return self._use_local
+
+    @property
+    def wants_timelapse(self) -> bool:
+        """Whether a timelapse attachment would actually be sent."""
+        return bool(self._telegram and self._include_timelapse_telegram)
+
+    def send(
+        self,
+        message: str,
+        subject: str = "Task completion detected",
+        image=None,
+        before_image=None,
+        after_image=None,
+        animation: Optional[bytes] = None,
+        animation_caption: Optional[str] = None,
+        key: Optional[str] = None,
+        tag: Optional[str] = None,
+        event: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Send a notification to all configured channels.
+
+        All channels are only queued in the outbox here; the outbox delivers
+        (and coalesces) them in the background.
+
+        Args:
+            message (str): Notification text.
+            subject (str): Email subject.
+            image: Optional screenshot for Telegram.
+            before_image: Optional "before" screenshot; combined side by side with after_image.
+            after_image: Optional "after" screenshot.
+            animation (Optional[bytes]): Optional GIF timelapse for Telegram.
+            animation_caption (Optional[str]): Caption of the timelapse.
+            key (Optional[str]): Idempotency key; sending the same key twice delivers once.
+            tag (Optional[str]): Local notifications with the same tag replace each other
+                where the platform supports it (Linux).
+            event (Optional[Dict[str, Any]]): Compact description for the collector
+                ("source", "state", "scores"); only used when forwarding.
+        """
+        key = key or uuid.uuid4().hex
+        if self._forwarder is not None:
+            payload = {
+                "key": key,
+                "host": self._host,
+                "timestamp": time.time(),
+                "message": message,
+                "subject": subject,
+            }
+            payload.update(event or {})
+            thumbnail = next((img for img in (image, after_image, before_image) if img is not None), None)
+            if thumbnail is not None and self._thumbnail_width > 0:
+                # Only the small JPEG travels to the collector, so only it is queued.
+                payload["thumbnail"] = encode_thumbnail(thumbnail, self._thumbnail_width)
+            self._post(f"{key}:forward", "forward", "event", payload)
+        if self._telegram and self._telegram.is_configured():
+            if self._include_screenshot_telegram:
+                send_image = image
+                caption = message
+
+                if before_image is not None or after_image is not None:
+                    if before_image is not None and after_image is not None:
+                        try:
+                            w = before_image.width + after_image.width
+                            h = max(before_image.height, after_image.height)
+                            combined = Image.new("RGB", (w, h))
+                            combined.paste(before_image.convert("RGB"), (0, 0))
+                            combined.paste(after_image.convert("RGB"), (before_image.width, 0))
+                            send_image = combined
+                            caption = f"{message}\n(Left: before, Right: after)"
+                        except Exception:
+                            send_image = after_image or before_image
+                    else:
+                        send_image = after_image or before_image
+
+                if send_image is not None:
+                    # A JPEG is a fraction of the raw pixels, which keeps the outbox insert short.
+                    self._post(f"{key}:photo", "telegram", "photo", {"caption": caption}, encode_photo(send_image))
+                else:
+                    self._post(f"{key}:message", "telegram", "message", {"text": message})
+            else:
+                self._post(f"{key}:message", "telegram", "message", {"text": message})
+
+            if animation and self._include_timelapse_telegram:
+                self._post(f"{key}:animation", "telegram", "animation", {"caption": animation_caption}, animation)
+        if self._email and self._email.is_configured():
+            self._post(f"{key}:mail", "email", "mail", {"subject": subject, "body": message})
+        if self._local_notifier:
+            self._post(f"{key}:local", "local", "notification", {"text": message, "tag": tag})
+
+    def _post(self, key: str, channel: str, kind: str, payload: Dict[str, Any], blob: Optional[bytes] = None) -> None:
+        if self._outbox is not None:
+            self._outbox.enqueue(channel, kind, payload, blob, key=key)
+            return
+        # No outbox: deliver right away, best-effort as before.
+        try:
+            self.deliver(OutboxItem(key, channel, kind, payload, blob, attempts=0, created=0.0))
+        except Exception:
+            pass
+
+    def deliver(self, item: OutboxItem) -> None:
+        """Deliver one outbox item through the real notifiers; raises on failure."""
+        if item.channel == "telegram" and self._telegram is not None:
+            payload = item.payload
+            if item.kind == "message":
+                self._telegram.send_message(payload["text"], strict=True)
+            elif item.kind == "photo":
+                self._telegram.send_photo(item.blob, caption=payload.get("caption"), strict=True)
+            elif item.kind == "album":
+                images = []
+                offset = 0
+                for photo in payload["photos"]:
+                    images.append(item.blob[offset : offset + photo["length"]])
+                    offset += photo["length"]
+                self._telegram.send_media_group(images, caption=payload.get("caption"), strict=True)
+            elif item.kind == "animation":
+                self._telegram.send_animation(item.blob, caption=payload.get("caption"), strict=True)
+            else:
+                raise ValueError(f"Unknown Telegram notification kind: {item.kind}")
+        elif item.channel == "email" and self._email is not None:
+            self._email.send_simple_mail(item.payload["subject"], item.payload["body"], strict=True)
+        elif item.channel == "forward" and self._forwarder is not None:
+            # Thumbnails were encoded when the events were queued
+            self._forwarder.post(item.payload["events"] if item.kind == "events" else [item.payload])
+        elif item.channel == "local" and self._local_notifier is not None:
+            if isinstance(self._local_notifier, LinuxNotifier):
+                self._local_notifier.send_notification(item.payload["text"], tag=item.payload.get("tag"))
+            else:
+                self._local_notifier.send_notification(item.payload["text"])
+        else:
+            raise ValueError(f"Channel '{item.channel}' is not configured.")
+
+    def pending_notifications(self) -> int:
+        """Number of queued notifications that were not delivered yet."""
+        return self._outbox.pending() if self._outbox is not None else 0
+
+    def flush(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for queued notifications; True once all are delivered."""
+        return self._outbox.flush(timeout) if self._outbox is not None else True
+
+    @property
+    def has_outbox(self) -> bool:
+        return self._outbox is not None
+
+    def close(self) -> None:
+        """Stop the background delivery without waiting for pending notifications."""
+        if self._outbox is not None:
+            self._outbox.close()
+
+    def print_local_hint(self) -> None:
+        """Print where to find a local notification that may have been missed."""
+        if self._use_local and platform.system() == "Darwin":
+            print(
+                "\nmacOS notification hint:"\
+                "\n- If you did not see the popup, open the Notification Center (top-right) and look for 'Task Completion Detector'."\
+                "\n- For more intrusive alerts, right-click that notification, choose 'Mitteilungs-Einstellungen…' and set for 'Skripteditor' / the notification app:"\
+                "\n  * Hinweisstil: 'Dauerhaft' (Alerts)"\
+                "\n  * Schreibtisch / Mitteilungszentrale / Sperrbildschirm: aktiviert"\
+                "\n  * Ton für Mitteilung wiedergeben: aktiviert"\
+                "\n  * Vorschauen zeigen: 'Immer'"\
+                "\n  * Mitteilungsgruppierung: 'Nach App'"
+            )
+        elif self._use_local and platform.system() == "Windows":
+            print(
+                "\nWindows notification hint:"\
+                "\n- If you did not see the popup, check the Action Center (Win+A) for 'Task Completion Detector'."\
+                "\n- For better notifications, install the BurntToast module: Install-Module -Name BurntToast -Scope CurrentUser"
+            )
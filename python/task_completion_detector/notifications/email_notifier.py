@@ -22,7 +22,7 @@ class EmailNotifier:
     def is_configured(self) -> bool:
         return bool(self._smtp_server and self._smtp_port and self._sender_mail and self._password and self._receiver_mail)
 
-    def send_simple_mail(self, subject: str, body: str) -> None:
+    def send_simple_mail(self, subject: str, body: str, strict: bool = False) -> None:
         if not self.is_configured():
             return
         msg = MIMEMultipart()
@@ -35,5 +35,6 @@ class EmailNotifier:
                 server.login(self._sender_mail, self._password)
                 server.send_message(msg)
         except Exception:
-            # For now ignore, later we can log.
-            pass
+            # Best-effort unless strict (the outbox retries strict sends).
+            if strict:
+                raise
@@ -0,0 +1,66 @@
+import base64
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .outbox import DeliveryError
+
+
+def encode_thumbnail(image, max_width: int = 320, quality: int = 70) -> str:
+    """Downscale an image and return it as base64 encoded JPEG."""
+    thumbnail = image.convert("RGB")
+    if thumbnail.width > max_width:
+        height = max(1, round(thumbnail.height * max_width / thumbnail.width))
+        thumbnail = thumbnail.resize((max_width, height))
+    buffer = BytesIO()
+    thumbnail.save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class EventForwarder:
+    """Send batches of compact events to a central collector (see collector.py).
+
+    Uses one pooled keep-alive HTTP session, so a host keeps a single
+    outbound connection no matter how many watches it runs. Delivery runs in
+    the outbox drainer, which batches, retries and deduplicates the events.
+    """
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 10.0) -> None:
+        self._url = url
+        self._timeout = timeout
+        self._session = requests.Session()
+        # Retries are handled by the outbox; the pool only keeps the connection alive.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        if token:
+            self._session.headers["Authorization"] = f"Bearer {token}"
+
+    def post(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST a batch of events.
+
+        Returns:
+            Dict[str, Any]: The collector's reply (accepted / duplicate counts).
+
+        Raises:
+            DeliveryError: If the collector is unreachable or rejects the batch.
+        """
+        try:
+            response = self._session.post(self._url, json={"events": events}, timeout=self._timeout)
+        except requests.RequestException as exc:
+            raise DeliveryError(f"Collector unreachable: {exc}") from exc
+        if response.status_code >= 300:
+            retry_after = response.headers.get("Retry-After")
+            raise DeliveryError(
+                f"Collector returned HTTP {response.status_code}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def close(self) -> None:
+        self._session.close()
@@ -0,0 +1,401 @@
+import os
+import socket
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Message types
+_METHOD_CALL = 1
+_METHOD_RETURN = 2
+_ERROR = 3
+
+# Header field codes
+_FIELD_PATH = 1
+_FIELD_INTERFACE = 2
+_FIELD_MEMBER = 3
+_FIELD_ERROR_NAME = 4
+_FIELD_REPLY_SERIAL = 5
+_FIELD_DESTINATION = 6
+_FIELD_SIGNATURE = 8
+
+_FIELD_TYPES = {
+    _FIELD_PATH: "o",
+    _FIELD_INTERFACE: "s",
+    _FIELD_MEMBER: "s",
+    _FIELD_ERROR_NAME: "s",
+    _FIELD_REPLY_SERIAL: "u",
+    _FIELD_DESTINATION: "s",
+    _FIELD_SIGNATURE: "g",
+}
+
+_FIXED = {"y": ("B", 1), "b": ("I", 4), "n": ("h", 2), "q": ("H", 2), "i": ("i", 4), "u": ("I", 4), "x": ("q", 8), "t": ("Q", 8), "d": ("d", 8)}
+_ALIGN = {"s": 4, "o": 4, "g": 1, "v": 1, "a": 4, "(": 8, "{": 8}
+
+
+class DBusError(Exception):
+    pass
+
+
+def _type_end(signature: str, start: int) -> int:
+    """Index after the complete type starting at ``start``."""
+    code = signature[start]
+    if code == "a":
+        return _type_end(signature, start + 1)
+    if code in "({":
+        closing = ")" if code == "(" else "}"
+        index = start + 1
+        while signature[index] != closing:
+            index = _type_end(signature, index)
+        return index + 1
+    return start + 1
+
+
+def _split_signature(signature: str) -> List[str]:
+    types = []
+    index = 0
+    while index < len(signature):
+        end = _type_end(signature, index)
+        types.append(signature[index:end])
+        index = end
+    return types
+
+
+def _alignment(code: str) -> int:
+    return _FIXED[code][1] if code in _FIXED else _ALIGN[code]
+
+
+class _Writer:
+    """Marshal values in little-endian D-Bus wire format.
+
+    Variants are passed as ``(signature, value)``, dicts as Python dicts.
+    """
+
+    def __init__(self, data: bytes = b"") -> None:
+        self.data = bytearray(data)
+
+    def align(self, n: int) -> None:
+        self.data.extend(b"\0" * (-len(self.data) % n))
+
+    def write(self, signature: str, values: Tuple[Any, ...]) -> None:
+        for code, value in zip(_split_signature(signature), values):
+            self._write(code, value)
+
+    def _write(self, code: str, value: Any) -> None:
+        head = code[0]
+        if head in _FIXED:
+            fmt, size = _FIXED[head]
+            self.align(size)
+            self.data.extend(struct.pack("<" + fmt, int(value) if head == "b" else value))
+        elif head in "so":
+            raw = value.encode("utf-8")
+            self.align(4)
+            self.data.extend(struct.pack("<I", len(raw)) + raw + b"\0")
+        elif head == "g":
+            raw = value.encode("ascii")
+            self.data.extend(struct.pack("<B", len(raw)) + raw + b"\0")
+        elif head == "v":
+            inner_signature, inner = value
+            self._write("g", inner_signature)
+            self._write(inner_signature, inner)
+        elif head == "a":
+            element = code[1:]
+            self.align(4)
+            length_at = len(self.data)
+            self.data.extend(b"\0\0\0\0")
+            self.align(_alignment(element[0]))
+            start = len(self.data)
+            items = value.items() if element[0] == "{" else value
+            for item in items:
+                self._write(element, item)
+            struct.pack_into("<I", self.data, length_at, len(self.data) - start)
+        elif head in "({":
+            self.align(8)
+            for member, item in zip(_split_signature(code[1:-1]), value):
+                self._write(member, item)
+        else:
+            raise DBusError(f"Cannot marshal D-Bus type '{code}'")
+
+
+class _Reader:
+    def __init__(self, data: bytes, offset: int = 0, little_endian: bool = True) -> None:
+        self.data = data
+        self.offset = offset
+        self._order = "<" if little_endian else ">"
+
+    def align(self, n: int) -> None:
+        self.offset += -self.offset % n
+
+    def read(self, signature: str) -> List[Any]:
+        return [self._read(code) for code in _split_signature(signature)]
+
+    def _unpack(self, fmt: str, size: int) -> Any:
+        value = struct.unpack_from(self._order + fmt, self.data, self.offset)[0]
+        self.offset += size
+        return value
+
+    def _read(self, code: str) -> Any:
+        head = code[0]
+        if head in _FIXED:
+            fmt, size = _FIXED[head]
+            self.align(size)
+            value = self._unpack(fmt, size)
+            return bool(value) if head == "b" else value
+        if head in "so":
+            self.align(4)
+            length = self._unpack("I", 4)
+            value = self.data[self.offset : self.offset + length].decode("utf-8", errors="replace")
+            self.offset += length + 1
+            return value
+        if head == "g":
+            length = self._unpack("B", 1)
+            value = self.data[self.offset : self.offset + length].decode("ascii")
+            self.offset += length + 1
+            return value
+        if head == "v":
+            inner_signature = self._read("g")
+            return inner_signature, self._read(inner_signature)
+        if head == "a":
+            element = code[1:]
+            self.align(4)
+            length = self._unpack("I", 4)
+            self.align(_alignment(element[0]))
+            end = self.offset + length
+            items = []
+            while self.offset < end:
+                items.append(self._read(element))
+            return dict(items) if element[0] == "{" else items
+        if head in "({":
+            self.align(8)
+            return tuple(self._read(member) for member in _split_signature(code[1:-1]))
+        raise DBusError(f"Cannot unmarshal D-Bus type '{code}'")
+
+
+def encode_message(
+    message_type: int,
+    serial: int,
+    fields: Dict[int, Any],
+    signature: str = "",
+    body: Tuple[Any, ...] = (),
+    flags: int = 0,
+) -> bytes:
+    """Build a complete D-Bus message."""
+    payload = _Writer()
+    if signature:
+        payload.write(signature, body)
+        fields = dict(fields)
+        fields[_FIELD_SIGNATURE] = signature
+    header = _Writer(struct.pack("<cBBBII", b"l", message_type, flags, 1, len(payload.data), serial))
+    header.write("a(yv)", ([(code, (_FIELD_TYPES[code], value)) for code, value in sorted(fields.items())],))
+    header.align(8)
+    return bytes(header.data + payload.data)
+
+
+def decode_message(data: bytes) -> Tuple[int, int, Dict[int, Any], List[Any]]:
+    """Parse a complete message into (type, serial, header fields, body values)."""
+    little_endian = data[0:1] == b"l"
+    order = "<" if little_endian else ">"
+    message_type = data[1]
+    body_length, serial = struct.unpack_from(order + "II", data, 4)
+    reader = _Reader(data, 12, little_endian)
+    fields = {code: value[1] for code, value in reader.read("a(yv)")[0]}
+    reader.align(8)
+    body_start = reader.offset
+    signature = fields.get(_FIELD_SIGNATURE, "")
+    body = _Reader(data[body_start : body_start + body_length], 0, little_endian).read(signature) if signature else []
+    return message_type, serial, fields, body
+
+
+def message_length(head: bytes) -> int:
+    """Total message length from its first 16 bytes."""
+    order = "<" if head[0:1] == b"l" else ">"
+    body_length, _, fields_length = struct.unpack_from(order + "III", head, 4)
+    header_length = 16 + fields_length
+    return header_length + (-header_length % 8) + body_length
+
+
+def session_bus_address() -> Optional[str]:
+    """Return the session bus address from the environment or the systemd default."""
+    address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+    if address:
+        return address
+    path = f"/run/user/{os.getuid()}/bus"
+    return f"unix:path={path}" if os.path.exists(path) else None
+
+
+class DBusConnection:
+    """Minimal D-Bus client over a unix socket: EXTERNAL auth and method calls."""
+
+    def __init__(self, address: str, timeout: float = 5.0) -> None:
+        self._sock = self._connect(address, timeout)
+        self._buffer = b""
+        self._serial = 0
+        try:
+            self._authenticate()
+            self.unique_name = self.call(
+                "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "Hello"
+            )[0]
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _connect(address: str, timeout: float) -> socket.socket:
+        last_error: Optional[Exception] = None
+        for entry in address.split(";"):
+            transport, _, params = entry.partition(":")
+            options = dict(part.split("=", 1) for part in params.split(",") if "=" in part)
+            if transport != "unix":
+                continue
+            if "path" in options:
+                target = options["path"]
+            elif "abstract" in options:
+                target = "\0" + options["abstract"]
+            else:
+                continue
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(target)
+                return sock
+            except OSError as exc:
+                sock.close()
+                last_error = exc
+        raise DBusError(f"Cannot connect to D-Bus at {address}: {last_error or 'no unix transport'}")
+
+    def _authenticate(self) -> None:
+        uid = str(os.getuid()).encode("ascii").hex()
+        self._sock.sendall(b"\0AUTH EXTERNAL " + uid.encode("ascii") + b"\r\n")
+        reply = self._read_line()
+        if not reply.startswith(b"OK"):
+            raise DBusError(f"D-Bus authentication failed: {reply.decode(errors='replace')}")
+        self._sock.sendall(b"BEGIN\r\n")
+
+    def _read_line(self) -> bytes:
+        while b"\r\n" not in self._buffer:
+            self._recv()
+        line, _, self._buffer = self._buffer.partition(b"\r\n")
+        return line
+
+    def _recv(self) -> None:
+        chunk = self._sock.recv(65536)
+        if not chunk:
+            raise DBusError("D-Bus connection closed")
+        self._buffer += chunk
+
+    def _read_message(self) -> bytes:
+        while len(self._buffer) < 16:
+            self._recv()
+        length = message_length(self._buffer[:16])
+        while len(self._buffer) < length:
+            self._recv()
+        data, self._buffer = self._buffer[:length], self._buffer[length:]
+        return data
+
+    def call(
+        self,
+        destination: str,
+        path: str,
+        interface: str,
+        member: str,
+        signature: str = "",
+        *args: Any,
+    ) -> List[Any]:
+        """Call a method and wait for its reply.
+
+        Raises:
+            DBusError: If the call returns an error or the connection fails.
+        """
+        self._serial += 1
+        serial = self._serial
+        fields = {
+            _FIELD_PATH: path,
+            _FIELD_INTERFACE: interface,
+            _FIELD_MEMBER: member,
+            _FIELD_DESTINATION: destination,
+        }
+        self._sock.sendall(encode_message(_METHOD_CALL, serial, fields, signature, args))
+        while True:
+            message_type, _, reply_fields, body = decode_message(self._read_message())
+            if reply_fields.get(_FIELD_REPLY_SERIAL) != serial:
+                continue  # Signals such as NameAcquired
+            if message_type == _ERROR:
+                detail = body[0] if body else ""
+                raise DBusError(f"{reply_fields.get(_FIELD_ERROR_NAME)}: {detail}")
+            if message_type == _METHOD_RETURN:
+                return body
+
+    def close(self) -> None:
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class LinuxNotifier:
+    """Send desktop notifications on Linux via org.freedesktop.Notifications.
+
+    Talks D-Bus directly over one persistent session bus connection (no
+    notify-send process per alert, no dbus bindings needed) and reconnects
+    when the connection breaks. Notifications sent with the same ``tag``
+    replace each other, so a re-armed watch updates its notification instead
+    of stacking new ones.
+    """
+
+    def __init__(self, title: str = "Task Completion Detector", address: Optional[str] = None) -> None:
+        self._title = title
+        self._address = address
+        self._connection: Optional[DBusConnection] = None
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return bool(self._address or session_bus_address())
+
+    def _notify(self, body: str, subtitle: Optional[str], replaces_id: int) -> int:
+        if self._connection is None:
+            address = self._address or session_bus_address()
+            if not address:
+                raise DBusError("No D-Bus session bus found")
+            self._connection = DBusConnection(address)
+        summary = f"{self._title}: {subtitle}" if subtitle else self._title
+        return self._connection.call(
+            "org.freedesktop.Notifications",
+            "/org/freedesktop/Notifications",
+            "org.freedesktop.Notifications",
+            "Notify",
+            "susssasa{sv}i",
+            self._title,
+            replaces_id,
+            "dialog-information",
+            summary,
+            body,
+            [],
+            {"urgency": ("y", 1)},
+            -1,
+        )[0]
+
+    def send_notification(self, body: str, subtitle: Optional[str] = None, tag: Optional[str] = None) -> Optional[int]:
+        """Show (or, for a known ``tag``, update) a notification.
+
+        Returns:
+            Optional[int]: The notification id, or None if it could not be shown.
+        """
+        with self._lock:
+            replaces_id = self._ids.get(tag, 0) if tag else 0
+            # Retry once on a fresh connection, e.g. after the session bus restarted.
+            for _ in range(2):
+                try:
+                    notification_id = self._notify(body, subtitle, replaces_id)
+                except (OSError, DBusError, struct.error):
+                    self.close()
+                    continue
+                if tag:
+                    self._ids[tag] = notification_id
+                return notification_id
+            # Best-effort only; ignore failures.
+            return None
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,435 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class DeliveryError(Exception):
+    """A notification could not be delivered and should be retried.
+
+    ``retry_after`` (seconds) overrides the exponential backoff when the
+    server said when to come back (e.g. Telegram's HTTP 429).
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class OutboxItem:
+    key: str  # idempotency key; a key is delivered at most once by the outbox
+    channel: str  # e.g. "telegram", "email"
+    kind: str  # e.g. "message", "photo", "animation", "mail"
+    payload: Dict[str, Any]
+    blob: Optional[bytes]
+    attempts: int
+    created: float
+
+
+# Delivers one item or raises; anything raised counts as a failed attempt.
+Transport = Callable[[OutboxItem], None]
+# Merges the queued items of one channel into deliveries, each with the items it covers.
+Merge = Callable[[List[OutboxItem]], List[Tuple[OutboxItem, List[OutboxItem]]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    channel TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    blob BLOB,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    delivered REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (delivered, next_attempt);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    channel TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class NotificationOutbox:
+    """Durable on-disk queue between the monitors and the network notifiers.
+
+    ``enqueue`` only inserts a row into a SQLite database in WAL mode (well
+    below a millisecond), so the monitor loop never waits for the network. A
+    background drainer delivers due rows in order through ``transport``;
+    failures are retried with exponential backoff and jitter until
+    ``max_age_seconds``, and once a channel works again every row waiting on
+    it is delivered right away in batches. Optionally, rows that arrive within
+    ``window_seconds`` of each other are merged per channel (``merge``) and
+    each channel is rate limited by a token bucket, whose state lives in the
+    database so the limit holds for all processes together. Rows are claimed with a lease
+    before delivery, so several monitors (threads or processes) can share one
+    outbox file without sending a row twice. A drainer only claims rows of the
+    ``channels`` its transport can deliver; rows of other channels wait for a
+    process that has them configured.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        transport: Transport,
+        base_backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 300.0,
+        max_age_seconds: float = 24 * 3600.0,
+        batch_size: int = 50,
+        lease_seconds: float = 120.0,
+        window_seconds: float = 0.0,
+        merge: Optional[Merge] = None,
+        rate_limits: Optional[Dict[str, Any]] = None,
+        channels: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Open (or create) the outbox database.
+
+        Args:
+            path (str): SQLite database file.
+            transport (Transport): Delivers one item, raising on failure.
+            base_backoff_seconds (float): Delay after the first failure; doubles per attempt.
+            max_backoff_seconds (float): Upper bound for the retry delay.
+            max_age_seconds (float): Undelivered items older than this are dropped, whether
+                they failed or were never picked up (e.g. their channel was disabled since).
+            batch_size (int): Rows fetched per drain pass.
+            lease_seconds (float): How long a claimed row is reserved for one drainer.
+            window_seconds (float): Coalescing window: new rows wait this long so that
+                rows enqueued meanwhile can be merged with them.
+            merge (Optional[Merge]): Merges the queued items of one channel (see
+                coalescing.merge_notifications).
+            rate_limits (Optional[Dict[str, TokenBucket]]): Token bucket per channel.
+            channels (Optional[Iterable[str]]): Channels the transport can deliver
+                (all channels if None). Only these are drained, flushed and counted as pending.
+        """
+        self._path = path
+        self._transport = transport
+        self._base_backoff = base_backoff_seconds
+        self._max_backoff = max_backoff_seconds
+        self._max_age = max_age_seconds
+        self._batch_size = batch_size
+        self._lease = lease_seconds
+        self._window = window_seconds
+        self._merge = merge
+        self._rate_limits = rate_limits or {}
+        self._throttled_until: Optional[float] = None
+        self._channels = None if channels is None else sorted(set(channels))
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_prune = 0.0
+
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL survives process crashes and avoids an fsync per enqueue.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._prune()
+
+    def enqueue(
+        self,
+        channel: str,
+        kind: str,
+        payload: Dict[str, Any],
+        blob: Optional[bytes] = None,
+        key: Optional[str] = None,
+    ) -> str:
+        """Persist a notification for delivery and wake the drainer.
+
+        Args:
+            channel (str): Channel name understood by the transport.
+            kind (str): Kind of delivery within the channel.
+            payload (Dict[str, Any]): JSON-serializable parameters.
+            blob (Optional[bytes]): Optional binary attachment.
+            key (Optional[str]): Idempotency key; enqueueing a known key is a no-op.
+
+        Returns:
+            str: The idempotency key of the row.
+        """
+        key = key or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (key, channel, kind, payload, blob, created, next_attempt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, channel, kind, json.dumps(payload), blob, now, now + self._window),
+            )
+        self._wake.set()
+        return key
+
+    def pending(self) -> int:
+        """Number of rows not delivered yet."""
+        with self._lock:
+            where, params = self._channel_filter()
+            return self._conn.execute(f"SELECT COUNT(*) FROM outbox WHERE delivered IS NULL{where}", params).fetchone()[0]
+
+    def _channel_filter(self) -> Tuple[str, Tuple[str, ...]]:
+        """SQL condition (and its parameters) restricting a query to the deliverable channels."""
+        if self._channels is None:
+            return "", ()
+        return f" AND channel IN ({', '.join('?' * len(self._channels))})", tuple(self._channels)
+
+    def drain_once(self) -> int:
+        """Deliver up to one batch of due rows.
+
+        Rows of a channel are only sent once one of them is due; rows still
+        inside their coalescing window join that delivery and are merged
+        with it.
+
+        Returns:
+            int: Number of rows delivered.
+        """
+        now = time.time()
+        where, params = self._channel_filter()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, channel, kind, payload, blob, attempts, created, next_attempt FROM outbox "
+                f"WHERE delivered IS NULL AND claimed_until <= ? AND (next_attempt <= ? OR attempts = 0){where} "
+                "ORDER BY id LIMIT ?",
+                (now, now) + params + (self._batch_size,),
+            ).fetchall()
+
+        by_channel: Dict[str, List[tuple]] = {}
+        for row in rows:
+            by_channel.setdefault(row[2], []).append(row)
+
+        delivered = 0
+        self._throttled_until = None
+        for channel, channel_rows in by_channel.items():
+            if not any(row[8] <= now for row in channel_rows):
+                continue
+            bucket = self._rate_limits.get(channel)
+            if bucket is not None and self._token_wait(channel, bucket) > 0:
+                self._throttle(channel, bucket)
+                continue
+            delivered += self._drain_channel(channel, channel_rows, bucket)
+        return delivered
+
+    def _drain_channel(self, channel: str, rows: List[tuple], bucket) -> int:
+        row_ids: Dict[str, int] = {}
+        items: List[OutboxItem] = []
+        for row_id, key, _, kind, payload, blob, attempts, created, _ in rows:
+            if self._claim(row_id):  # Otherwise another drainer took it.
+                row_ids[key] = row_id
+                items.append(OutboxItem(key, channel, kind, json.loads(payload), blob, attempts, created))
+        deliveries = self._merge(items) if self._merge is not None else [(item, [item]) for item in items]
+
+        delivered = 0
+        for index, (item, sources) in enumerate(deliveries):
+            later = [source for _, group in deliveries[index + 1 :] for source in group]
+            if self._stop.is_set():
+                # Closing: hand the rest back instead of delaying close() by a whole batch
+                self._release([row_ids[source.key] for source in sources + later])
+                break
+            if bucket is not None and not self._take_token(channel, bucket):
+                self._release([row_ids[source.key] for source in sources + later])
+                self._throttle(channel, bucket)
+                break
+            try:
+                self._transport(item)
+            except Exception as exc:
+                retry_at = self._record_failure([row_ids[source.key] for source in sources], sources, exc)
+                # Keep the order within a channel: later rows wait for the failed ones.
+                self._release([row_ids[source.key] for source in later], next_attempt=retry_at)
+                break
+
+            delivered += len(sources)
+            with self._lock:
+                self._conn.executemany(
+                    "UPDATE outbox SET delivered = ?, blob = NULL WHERE id = ?",
+                    [(time.time(), row_ids[source.key]) for source in sources],
+                )
+
+        if delivered:
+            with self._lock:
+                # The channel works again: catch up on everything that was waiting for it.
+                self._conn.execute(
+                    "UPDATE outbox SET next_attempt = ? WHERE channel = ? AND delivered IS NULL AND attempts > 0 "
+                    "AND next_attempt > ?",
+                    (time.time(), channel, time.time()),
+                )
+        return delivered
+
+    def _claim(self, row_id: int) -> bool:
+        # A lease instead of a lock: if this process dies mid-delivery, the row becomes due again.
+        now = time.time()
+        where, params = self._channel_filter()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET claimed_until = ? "
+                f"WHERE id = ? AND claimed_until <= ? AND delivered IS NULL{where}",
+                (now + self._lease, row_id, now) + params,
+            )
+            return cursor.rowcount == 1
+
+    def _release(self, row_ids: List[int], next_attempt: Optional[float] = None) -> None:
+        with self._lock:
+            if next_attempt is None:
+                self._conn.executemany("UPDATE outbox SET claimed_until = 0 WHERE id = ?", [(i,) for i in row_ids])
+            else:
+                self._conn.executemany(
+                    "UPDATE outbox SET claimed_until = 0, next_attempt = ? WHERE id = ?",
+                    [(next_attempt, i) for i in row_ids],
+                )
+
+    def _take_token(self, channel: str, bucket) -> bool:
+        """Take a token from the channel's bucket shared by every process using this outbox."""
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock first, so no other process reads the same tokens meanwhile.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM rate_limits WHERE channel = ?", (channel,)).fetchone()
+                if row is not None:
+                    bucket.restore(*row)
+                taken = bucket.take()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (channel, tokens, updated) VALUES (?, ?, ?)",
+                    (channel,) + bucket.state,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return taken
+
+    def _token_wait(self, channel: str, bucket) -> float:
+        """Seconds until the channel's shared bucket has a token again."""
+        with self._lock:
+            row = self._conn.execute("SELECT tokens, updated FROM rate_limits WHERE channel = ?", (channel,)).fetchone()
+        if row is not None:
+            bucket.restore(*row)
+        return bucket.wait_seconds()
+
+    def _throttle(self, channel: str, bucket) -> None:
+        until = time.time() + self._token_wait(channel, bucket)
+        if self._throttled_until is None or until < self._throttled_until:
+            self._throttled_until = until
+
+    def _record_failure(self, row_ids: List[int], items: List[OutboxItem], exc: Exception) -> float:
+        """Schedule the retry of a failed delivery and return its time."""
+        attempts = max(item.attempts for item in items) + 1
+        now = time.time()
+        expired = [row_id for row_id, item in zip(row_ids, items) if now - item.created > self._max_age]
+        if expired:
+            print(f"Dropping {len(expired)} {items[0].channel} notification(s) after {attempts} failed attempts: {exc}")
+            with self._lock:
+                self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in expired])
+
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            delay = float(retry_after)
+        else:
+            # Exponential backoff with jitter, so several clients do not retry in lockstep.
+            delay = min(self._max_backoff, self._base_backoff * (2 ** (attempts - 1)))
+            delay *= random.uniform(0.5, 1.0)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+                [(attempts, now + delay, str(exc)[:500], row_id) for row_id in row_ids if row_id not in expired],
+            )
+        return now + delay
+
+    def _next_due(self) -> Optional[float]:
+        where, params = self._channel_filter()
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT MIN(MAX(next_attempt, claimed_until)) FROM outbox WHERE delivered IS NULL{where}", params
+            ).fetchone()[0]
+
+    def _prune(self, keep_seconds: float = 7 * 24 * 3600.0) -> None:
+        now = time.time()
+        self._next_prune = now + 3600.0
+        with self._lock:
+            # Delivered rows only keep their key (for idempotency) and are dropped after a week.
+            self._conn.execute("DELETE FROM outbox WHERE delivered IS NOT NULL AND delivered < ?", (now - keep_seconds,))
+            # Rows nobody delivers (e.g. of a channel that was disabled since) expire like failed ones.
+            expired = self._conn.execute(
+                "DELETE FROM outbox WHERE delivered IS NULL AND created < ? AND claimed_until <= ?",
+                (now - self._max_age, now),
+            ).rowcount
+        if expired:
+            print(f"Dropping {expired} notification(s) that were not delivered within {self._max_age / 3600.0:g} hours.")
+
+    def start(self) -> None:
+        """Start the background drainer thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            next_due = None
+            try:
+                if time.time() >= self._next_prune:
+                    self._prune()
+                if self.drain_once():
+                    continue  # More rows may be due (batched catch-up).
+                next_due = self._next_due()
+            except Exception as exc:
+                # Transport errors are handled per row; anything else must not end the drainer.
+                print(f"Notification outbox error: {exc}")
+            if self._throttled_until is not None:
+                next_due = max(next_due or 0.0, self._throttled_until)
+            timeout = 60.0 if next_due is None else min(max(next_due - time.time(), 0.05), 60.0)
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def flush(self, timeout: float) -> bool:
+        """Wait until every row is delivered or ``timeout`` seconds passed.
+
+        Returns:
+            bool: True if nothing is pending anymore.
+        """
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            if time.monotonic() >= deadline:
+                return False
+            if self._thread is None:
+                self.drain_once()
+            else:
+                self._wake.set()
+            time.sleep(0.05)
+        return True
+
+    def close(self, flush_timeout: float = 0.0) -> None:
+        """Stop the drainer, optionally after waiting ``flush_timeout`` seconds for pending rows."""
+        if self._conn is None:
+            return
+        if flush_timeout > 0 and self.pending():
+            print("Delivering pending notifications...")
+            if not self.flush(flush_timeout):
+                print(
+                    f"{self.pending()} notification(s) could not be delivered yet; they stay queued in "
+                    f"{self._path} and are sent by the next run or 'python main.py drain-outbox'."
+                )
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            # No timeout: a delivery in flight must still be able to mark its rows as delivered.
+            # It is bounded by the transport's own timeouts, and the drainer stops after it.
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+
+    def items(self) -> List[OutboxItem]:
+        """Return all pending rows (for inspection)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, channel, kind, payload, blob, attempts, created FROM outbox "
+                "WHERE delivered IS NULL ORDER BY id"
+            ).fetchall()
+        return [OutboxItem(k, c, kind, json.loads(p), b, a, cr) for k, c, kind, p, b, a, cr in rows]
@@ -1,10 +1,40 @@
+import json
 import os
 from io import BytesIO
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import requests
 
 from ..config_loader import ConfigLoader
+from .outbox import DeliveryError
+
+# Telegram shows photos at most 2560 pixels on the long side and recompresses them anyway
+_PHOTO_MAX_SIDE = 2560
+
+
+def encode_photo(image, quality: int = 85) -> bytes:
+    """Encode a screenshot as JPEG for queueing and sending as a Telegram photo.
+
+    Much smaller (and faster to store) than raw pixels or PNG; screens larger
+    than Telegram displays are reduced by an integer factor first.
+    """
+    photo = image.convert("RGB")
+    factor = -(-max(photo.size) // _PHOTO_MAX_SIDE)
+    if factor > 1:
+        photo = photo.reduce(factor)
+    buffer = BytesIO()
+    photo.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _photo_file(image, name: str) -> Tuple[str, BytesIO, str]:
+    """Multipart file tuple for a PIL image (sent as PNG) or JPEG bytes from encode_photo."""
+    if isinstance(image, bytes):
+        return f"{name}.jpg", BytesIO(image), "image/jpeg"
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    buffer.seek(0)
+    return f"{name}.png", buffer, "image/png"
 
 
 class TelegramNotifier:
@@ -18,39 +48,114 @@ class TelegramNotifier:
     def is_configured(self) -> bool:
         return bool(self._bot_token and self._chat_id)
 
-    def send_message(self, text: str) -> None:
+    @staticmethod
+    def _check_response(response) -> None:
+        """Raise DeliveryError unless the Bot API accepted the request (strict mode)."""
+        if response.ok:
+            return
+        retry_after = None
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after")
+        except ValueError:
+            pass
+        raise DeliveryError(f"Telegram API returned HTTP {response.status_code}", retry_after=retry_after)
+
+    def send_message(self, text: str, strict: bool = False) -> None:
+        """Send a text message.
+
+        Args:
+            text (str): Message text.
+            strict (bool): Raise on network or API errors instead of ignoring them.
+        """
         if not self.is_configured():
             return
         url = f"https://api.telegram.org/bot{self._bot_token}/sendMessage"
         payload = {"chat_id": self._chat_id, "text": text}
-        # Best-effort; ignore network errors for now.
+        # Best-effort unless strict; ignore network errors for now.
         try:
-            requests.post(url, json=payload, timeout=10)
+            response = requests.post(url, json=payload, timeout=10)
+            if strict:
+                self._check_response(response)
         except Exception:
-            pass
+            if strict:
+                raise
 
-    def send_photo(self, image, caption: Optional[str] = None) -> None:
+    def send_photo(self, image, caption: Optional[str] = None, strict: bool = False) -> None:
+        """Send a screenshot: a PIL image or JPEG bytes (see encode_photo)."""
         if not self.is_configured():
             return
         if image is None:
             return
         url = f"https://api.telegram.org/bot{self._bot_token}/sendPhoto"
+        buffer = None
         try:
-            buffer = BytesIO()
-            image.save(buffer, format="PNG")
-            buffer.seek(0)
+            photo = _photo_file(image, "screenshot")
+            buffer = photo[1]
             files = {
-                "photo": ("screenshot.png", buffer, "image/png"),
+                "photo": photo,
             }
             data = {"chat_id": self._chat_id}
             if caption is not None:
                 data["caption"] = caption
-            requests.post(url, data=data, files=files, timeout=10)
+            response = requests.post(url, data=data, files=files, timeout=10)
+            if strict:
+                self._check_response(response)
         except Exception:
-            # Best-effort; ignore network errors for now.
-            pass
+            # Best-effort unless strict; ignore network errors for now.
+            if strict:
+                raise
         finally:
-            try:
+            if buffer is not None:
                 buffer.close()
-            except Exception:
-                pass
+
+    def send_animation(
+        self,
+        data: bytes,
+        caption: Optional[str] = None,
+        filename: str = "timelapse.gif",
+        strict: bool = False,
+    ) -> None:
+        if not self.is_configured():
+            return
+        if not data:
+            return
+        url = f"https://api.telegram.org/bot{self._bot_token}/sendAnimation"
+        try:
+            files = {
+                "animation": (filename, BytesIO(data), "image/gif"),
+            }
+            payload = {"chat_id": self._chat_id}
+            if caption is not None:
+                payload["caption"] = caption
+            response = requests.post(url, data=payload, files=files, timeout=30)
+            if strict:
+                self._check_response(response)
+        except Exception:
+            # Best-effort unless strict; ignore network errors for now.
+            if strict:
+                raise
+
+    def send_media_group(self, images: List, caption: Optional[str] = None, strict: bool = False) -> None:
+        """Send up to 10 screenshots (PIL images or JPEG bytes) as one album; the caption is shown with the first photo."""
+        if not self.is_configured():
+            return
+        if not images:
+            return
+        url = f"https://api.telegram.org/bot{self._bot_token}/sendMediaGroup"
+        try:
+            media = []
+            files = {}
+            for index, image in enumerate(images[:10]):
+                files[f"photo{index}"] = _photo_file(image, f"screenshot{index}")
+                entry = {"type": "photo", "media": f"attach://photo{index}"}
+                if index == 0 and caption:
+                    entry["caption"] = caption
+                media.append(entry)
+            data = {"chat_id": self._chat_id, "media": json.dumps(media)}
+            response = requests.post(url, data=data, files=files, timeout=30)
+            if strict:
+                self._check_response(response)
+        except Exception:
+            # Best-effort unless strict; ignore network errors for now.
+            if strict:
+                raise
@@ -0,0 +1,432 @@
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .events import (
+    BusyEvent,
+    ChangedEvent,
+    MonitorEvent,
+    RuleFiredEvent,
+    StableEvent,
+    TemplateFoundEvent,
+    TickEvent,
+)
+from .frame_buffers import FrameBuffers, frame_size, to_image
+
+# Score kinds a frame can provide
+SCORE_PREVIOUS = "previous"  # mean difference to the previous capture (stability)
+SCORE_REFERENCE = "reference"  # mean difference to the reference capture (change)
+SCORE_TEMPLATE = "template"  # best template match (0..1)
+
+# Called once per computed score: (kind, score, difference plane or None) -> threshold to use.
+# The difference plane is a scratch buffer that is only valid during the call.
+ScoreObserver = Callable[[str, float, object], float]
+
+
+class Frame:
+    """One capture flowing through the pipeline.
+
+    The capture is either a PIL image or a BGRX pixel array that the capture
+    backend reuses for the next grab (see screen_capture.py). Grayscale
+    conversion into a preallocated plane and every score kind are computed
+    lazily and at most once, so all rules of a region share a single scoring
+    pass per tick. A PIL image of a pixel array is only made when an event or
+    template match needs one.
+    """
+
+    def __init__(
+        self,
+        capture,
+        previous: Optional["Frame"],
+        reference: Optional["Frame"],
+        observe: ScoreObserver,
+        buffers: FrameBuffers,
+        matcher=None,
+    ) -> None:
+        self.timestamp = time.time()
+        self.match = None
+        self._capture = capture
+        self._image = None
+        self._previous = previous
+        self._reference = reference
+        self._observe = observe
+        self._buffers = buffers
+        self._matcher = matcher
+        in_use = [frame.plane for frame in (previous, reference) if frame is not None]
+        self.plane = buffers.acquire(*in_use)
+        self._gray_loaded = False
+        self._scores: Dict[str, Optional[float]] = {}
+        self._thresholds: Dict[str, float] = {}
+
+    @property
+    def image(self):
+        if self._image is None and self._capture is not None:
+            self._image = to_image(self._capture)
+        return self._image
+
+    @property
+    def gray(self):
+        if not self._gray_loaded:
+            self._buffers.load_gray(self._capture, self.plane)
+            self._gray_loaded = True
+        return self.plane
+
+    @property
+    def reference_image(self):
+        return self._reference.image if self._reference is not None else None
+
+    @property
+    def scores(self) -> Dict[str, float]:
+        """All scores computed for this frame so far."""
+        return {kind: score for kind, score in self._scores.items() if score is not None}
+
+    def score(self, kind: str) -> Optional[float]:
+        """Return the score of the given kind, or None if it cannot be computed yet."""
+        if kind not in self._scores:
+            self._scores[kind] = self._compute(kind)
+        return self._scores[kind]
+
+    def threshold(self, kind: str) -> Optional[float]:
+        """Threshold the observer assigned to the score of the given kind."""
+        self.score(kind)
+        return self._thresholds.get(kind)
+
+    def _compute(self, kind: str) -> Optional[float]:
+        if kind == SCORE_TEMPLATE:
+            if self._matcher is None:
+                raise ValueError("Template conditions require a TemplateMatcher.")
+            self.match = self._matcher.match(self.image)
+            score = float(self.match.score)
+            self._thresholds[kind] = self._observe(kind, score, None)
+            return score
+
+        other = self._previous if kind == SCORE_PREVIOUS else self._reference
+        if other is None:
+            return None
+        # Mean absolute difference in grayscale (0..255), computed in place
+        score, diff = self._buffers.difference(other.gray, self.gray)
+        self._thresholds[kind] = self._observe(kind, score, diff)
+        return score
+
+    def detach(self, keep_image: bool = False) -> None:
+        """Release the capture once the tick is evaluated.
+
+        Drops links to older frames so frames never form a chain in memory,
+        and fills the grayscale plane before the capture backend reuses its
+        buffer. Only a frame that becomes the reference keeps (a copy of) its
+        image, for "before" screenshots.
+        """
+        self.gray
+        if keep_image:
+            self.image
+        else:
+            self._image = None
+        self._capture = None
+        self._previous = None
+        self._reference = None
+
+
+class Condition:
+    """A level-based policy: ``update`` returns whether the condition currently holds."""
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        pass
+
+    def on_fired(self, pipeline: "DetectionPipeline") -> None:
+        pass
+
+    def event(self, region: str, frame: Frame) -> Optional[MonitorEvent]:
+        """Typed event for built-in single-condition modes."""
+        return None
+
+
+class StableCondition(Condition):
+    """Holds once the region has been quiet for ``seconds``."""
+
+    def __init__(self, seconds: float, threshold: Optional[float] = None) -> None:
+        self._seconds = float(seconds)
+        self._threshold = threshold
+        self._stable_time = 0.0
+        self._last_threshold = 0.0
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        score = frame.score(SCORE_PREVIOUS)
+        if score is None:
+            return False
+        threshold = self._threshold if self._threshold is not None else frame.threshold(SCORE_PREVIOUS)
+        self._last_threshold = threshold
+        if score <= threshold:
+            self._stable_time += interval
+        else:
+            self._stable_time = 0.0
+        return self._stable_time >= self._seconds
+
+    def reset(self) -> None:
+        self._stable_time = 0.0
+
+    def event(self, region: str, frame: Frame) -> Optional[MonitorEvent]:
+        return StableEvent(region, frame.timestamp, self._stable_time, self._last_threshold, image=frame.image)
+
+
+class ChangedCondition(Condition):
+    """Holds once the region differs from its reference for ``required_hits`` ticks."""
+
+    def __init__(self, threshold: Optional[float] = None, required_hits: int = 2) -> None:
+        self._threshold = threshold
+        self._required_hits = required_hits
+        self._hits = 0
+        self._last_score = 0.0
+        self._last_threshold = 0.0
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        score = frame.score(SCORE_REFERENCE)
+        if score is None:
+            return False
+        threshold = self._threshold if self._threshold is not None else frame.threshold(SCORE_REFERENCE)
+        self._last_score, self._last_threshold = score, threshold
+        self._hits = self._hits + 1 if score > threshold else 0
+        return self._hits >= self._required_hits
+
+    def reset(self) -> None:
+        self._hits = 0
+
+    def on_fired(self, pipeline: "DetectionPipeline") -> None:
+        # Re-arm: the changed image becomes the new reference.
+        pipeline.rebase()
+        self._hits = 0
+
+    def event(self, region: str, frame: Frame) -> Optional[MonitorEvent]:
+        return ChangedEvent(
+            region,
+            frame.timestamp,
+            self._last_score,
+            self._last_threshold,
+            before_image=frame.reference_image,
+            after_image=frame.image,
+        )
+
+
+class TemplateCondition(Condition):
+    """Holds while a template is visible for ``required_hits`` consecutive ticks."""
+
+    def __init__(self, threshold: Optional[float] = None, required_hits: int = 2) -> None:
+        self._threshold = threshold
+        self._required_hits = required_hits
+        self._hits = 0
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        score = frame.score(SCORE_TEMPLATE)
+        threshold = self._threshold if self._threshold is not None else frame.threshold(SCORE_TEMPLATE)
+        self._hits = self._hits + 1 if score >= threshold else 0
+        return self._hits >= self._required_hits
+
+    def reset(self) -> None:
+        self._hits = 0
+
+    def event(self, region: str, frame: Frame) -> Optional[MonitorEvent]:
+        match = frame.match
+        return TemplateFoundEvent(
+            region,
+            frame.timestamp,
+            match.score,
+            match.name,
+            match.x,
+            match.y,
+            image=frame.image,
+        )
+
+
+class SequenceCondition(Condition):
+    """``first then second``: holds once ``second`` holds after ``first`` has held."""
+
+    def __init__(self, first: Condition, second: Condition) -> None:
+        self._first = first
+        self._second = second
+        self._latched = False
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        if not self._latched:
+            if self._first.update(frame, interval):
+                self._latched = True
+                # Only what happens after the first condition counts for the second one.
+                self._second.reset()
+            return False
+        return self._second.update(frame, interval)
+
+    def reset(self) -> None:
+        self._latched = False
+        self._first.reset()
+        self._second.reset()
+
+    def on_fired(self, pipeline: "DetectionPipeline") -> None:
+        self._first.on_fired(pipeline)
+        self._second.on_fired(pipeline)
+        self.reset()
+
+
+class AllCondition(Condition):
+    """``a and b``: holds while every sub-condition holds."""
+
+    def __init__(self, conditions: Sequence[Condition]) -> None:
+        self._conditions = list(conditions)
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        # Update every condition (no short-circuit) so their state stays current.
+        levels = [condition.update(frame, interval) for condition in self._conditions]
+        return all(levels)
+
+    def reset(self) -> None:
+        for condition in self._conditions:
+            condition.reset()
+
+    def on_fired(self, pipeline: "DetectionPipeline") -> None:
+        for condition in self._conditions:
+            condition.on_fired(pipeline)
+
+
+class Rule:
+    """A named condition that fires once each time it starts to hold."""
+
+    def __init__(self, name: str, condition: Condition, typed_event: bool = False) -> None:
+        self.name = name
+        self.condition = condition
+        self._typed_event = typed_event
+        self._active = False
+
+    def update(self, frame: Frame, interval: float) -> bool:
+        level = self.condition.update(frame, interval)
+        fired = level and not self._active
+        self._active = level
+        return fired
+
+    def event(self, region: str, frame: Frame) -> MonitorEvent:
+        event = self.condition.event(region, frame) if self._typed_event else None
+        return event or RuleFiredEvent(region, frame.timestamp, self.name, image=frame.image, scores=frame.scores)
+
+
+def parse_rule(
+    spec: str,
+    default_stable_seconds: float,
+    change_threshold: Optional[float] = None,
+) -> Rule:
+    """Parse a rule such as ``"change then stable:20"`` or ``"stable:30 and template"``.
+
+    Atoms are ``stable[:SECONDS]``, ``change`` and ``template``; ``stable`` and
+    ``change`` accept an explicit threshold as ``@VALUE`` (e.g. ``stable:20@0.5``).
+    ``and`` binds tighter than ``then``.
+
+    All rules of a region share one reference frame: when a ``change`` fires,
+    the changed image becomes the reference for every rule, not just its own.
+
+    Raises:
+        ValueError: If the rule cannot be parsed.
+    """
+    steps: List[Condition] = []
+    for step in spec.lower().split(" then "):
+        atoms = [_parse_atom(atom.strip(), default_stable_seconds, change_threshold) for atom in step.split(" and ")]
+        steps.append(atoms[0] if len(atoms) == 1 else AllCondition(atoms))
+    condition = steps[0]
+    for step in steps[1:]:
+        condition = SequenceCondition(condition, step)
+    return Rule(spec.strip(), condition)
+
+
+def _parse_atom(atom: str, default_stable_seconds: float, change_threshold: Optional[float]) -> Condition:
+    name, _, threshold_text = atom.partition("@")
+    name, _, argument = name.partition(":")
+    try:
+        threshold = float(threshold_text) if threshold_text else None
+        seconds = float(argument) if argument else None
+    except ValueError:
+        pass
+    else:
+        for value in (seconds, threshold):
+            if value is not None and not (math.isfinite(value) and value >= 0):
+                raise ValueError(f"Invalid rule condition '{atom}': seconds and thresholds must be finite and not negative.")
+        if name == "stable":
+            return StableCondition(seconds if seconds is not None else default_stable_seconds, threshold)
+        if name == "change" and seconds is None:
+            return ChangedCondition(threshold if threshold is not None else change_threshold)
+        if name == "template" and seconds is None and threshold is None:
+            return TemplateCondition()
+    raise ValueError(f"Invalid rule condition '{atom}'. Use stable[:SECONDS][@THRESHOLD], change[@THRESHOLD] or template.")
+
+
+class DetectionPipeline:
+    """Source -> preprocess -> score -> policy stages for one region.
+
+    Every tick captures one frame, which all rules evaluate; scores are
+    computed lazily on the shared frame, so a region with several rules still
+    costs one capture and at most one scoring pass per score kind. Grayscale
+    planes and difference scratch come from one FrameBuffers pool per region,
+    so steady-state ticks do not allocate pixel memory.
+    """
+
+    def __init__(
+        self,
+        region: str,
+        capture: Callable[[], object],
+        rules: Sequence[Rule],
+        interval_seconds: float,
+        observe: ScoreObserver,
+        matcher=None,
+    ) -> None:
+        self._region = region
+        self._capture = capture
+        self._rules = list(rules)
+        self._interval = interval_seconds
+        self._observe = observe
+        self._matcher = matcher
+        self._previous: Optional[Frame] = None
+        self._reference: Optional[Frame] = None
+        self._buffers: Optional[FrameBuffers] = None
+        self._rebase = False
+        self._busy: Optional[bool] = None
+
+    def rebase(self) -> None:
+        """Make the current frame the new reference after this tick."""
+        self._rebase = True
+
+    def step(self) -> List[MonitorEvent]:
+        """Run one tick: capture, score and evaluate every rule (blocking)."""
+        capture = self._capture()
+        size = frame_size(capture)
+        if self._buffers is None or self._buffers.size != size:
+            # First frame or the capture size changed: older frames cannot be compared anymore
+            self._buffers = FrameBuffers(*size)
+            self._previous = None
+            self._reference = None
+        frame = Frame(capture, self._previous, self._reference, self._observe, self._buffers, matcher=self._matcher)
+
+        fired = [rule for rule in self._rules if rule.update(frame, self._interval)]
+
+        events: List[MonitorEvent] = []
+        scores = frame.scores
+        for kind in (SCORE_PREVIOUS, SCORE_REFERENCE, SCORE_TEMPLATE):
+            if kind in scores:
+                events.append(TickEvent(self._region, frame.timestamp, scores[kind], frame.threshold(kind), scores=scores))
+                break
+
+        previous_score = scores.get(SCORE_PREVIOUS)
+        if previous_score is not None:
+            if previous_score > frame.threshold(SCORE_PREVIOUS):
+                if self._busy is not True:
+                    events.append(BusyEvent(self._region, frame.timestamp, previous_score))
+                self._busy = True
+            else:
+                self._busy = False
+
+        for rule in fired:
+            events.append(rule.event(self._region, frame))
+            rule.condition.on_fired(self)
+
+        adopt = self._reference is None or self._rebase
+        frame.detach(keep_image=adopt)
+        self._previous = frame
+        if adopt:
+            self._reference = frame
+            self._rebase = False
+        return events
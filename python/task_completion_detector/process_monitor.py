@@ -0,0 +1,265 @@
+import os
+import select
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config_loader import ConfigLoader
+from .monitor import MonitorSettings
+from .notifications import NotificationDispatcher
+
+_PROC = "/proc"
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def process_name(pid: int) -> str:
+    comm = _read_text(f"{_PROC}/{pid}/comm")
+    return comm.strip() if comm else str(pid)
+
+
+def process_exists(pid: int) -> bool:
+    """Whether a process with this pid exists (POSIX only).
+
+    Raises:
+        RuntimeError: On platforms without kill(pid, 0) semantics (on Windows,
+            signal 0 is CTRL_C_EVENT and would interrupt the console instead).
+    """
+    if os.name != "posix":
+        raise RuntimeError("Watching processes is only supported on Linux and macOS.")
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def process_tree(pid: int) -> List[int]:
+    """Return the pid and all of its live descendants."""
+    tree: List[int] = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        if not os.path.isdir(f"{_PROC}/{current}"):
+            continue
+        tree.append(current)
+        pending.extend(_children(current))
+    return tree
+
+
+def _children(pid: int) -> List[int]:
+    children: List[int] = []
+    try:
+        tids = os.listdir(f"{_PROC}/{pid}/task")
+    except OSError:
+        return children
+    for tid in tids:
+        text = _read_text(f"{_PROC}/{pid}/task/{tid}/children")
+        if text:
+            children.extend(int(child) for child in text.split())
+    return children
+
+
+def _cpu_ticks(pid: int) -> Optional[int]:
+    """utime + stime of the process plus cutime + cstime of its reaped children."""
+    stat = _read_text(f"{_PROC}/{pid}/stat")
+    if not stat:
+        return None
+    # The command name may contain spaces and parentheses; fields start after the last ')'
+    fields = stat[stat.rfind(")") + 2:].split()
+    try:
+        return sum(int(value) for value in fields[11:15])
+    except (IndexError, ValueError):
+        return None
+
+
+def _io_bytes(pid: int) -> Optional[int]:
+    """Characters read and written (includes pipes and terminals, not only disk)."""
+    text = _read_text(f"{_PROC}/{pid}/io")
+    if not text:
+        return None
+    values: Dict[str, int] = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        if key in ("rchar", "wchar"):
+            values[key] = int(value)
+    return sum(values.values()) if values else None
+
+
+class _ExitWaiter:
+    """Wait for a process to exit via pidfd (no polling), falling back to kill(pid, 0)."""
+
+    def __init__(self, pid: int) -> None:
+        if not process_exists(pid):
+            raise RuntimeError(f"No process with pid {pid} is running.")
+        self._pid = pid
+        self._poller = None
+        self._pidfd: Optional[int] = None
+        self._exited = False
+        pidfd_open = getattr(os, "pidfd_open", None)
+        if pidfd_open is not None:
+            try:
+                self._pidfd = pidfd_open(pid)
+                self._poller = select.poll()
+                self._poller.register(self._pidfd, select.POLLIN)
+            except ProcessLookupError:
+                # Exited between the check above and pidfd_open
+                self._pidfd = None
+                self._poller = None
+                self._exited = True
+            except OSError:
+                self._pidfd = None
+                self._poller = None
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Wait up to ``timeout`` seconds (forever if None); return True once the process exited."""
+        if self._exited:
+            return True
+        if self._poller is not None:
+            return bool(self._poller.poll(None if timeout is None else max(timeout, 0.0) * 1000.0))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if not self._alive():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            remaining = 1.0 if deadline is None else deadline - time.monotonic()
+            time.sleep(max(min(remaining, 1.0), 0.0))
+
+    def _alive(self) -> bool:
+        return process_exists(self._pid)
+
+    def close(self) -> None:
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+            self._pidfd = None
+
+
+class ProcessMonitor:
+    """Detect task completion from a process instead of the screen.
+
+    Either waits for the process to exit (pidfd based, so it costs nothing while
+    waiting), or samples /proc/<pid>/stat and /proc/<pid>/io for the whole
+    process tree and applies the usual stability logic: the task counts as done
+    once CPU and I/O have stayed below the idle limits for
+    ``stable_seconds_threshold`` seconds.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        settings: MonitorSettings,
+        config_loader: Optional[ConfigLoader] = None,
+        cpu_idle_percent: float = 2.0,
+        io_idle_bytes_per_second: float = 4096.0,
+    ) -> None:
+        self._pid = int(pid)
+        self._settings = settings
+        self._config_loader = config_loader or ConfigLoader()
+        self._cpu_idle_percent = float(cpu_idle_percent)
+        self._io_idle_bytes = float(io_idle_bytes_per_second)
+        self._name = process_name(self._pid)
+        self._notifier = NotificationDispatcher(self._config_loader)
+        try:
+            self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        except (AttributeError, ValueError, OSError):
+            self._clock_ticks = 100
+
+    def _label(self) -> str:
+        return f"process {self._pid} ({self._name})"
+
+    def _notify_exit(self) -> None:
+        print(f"The {self._label()} exited. Sending notifications.")
+        message = f"Process {self._name} (pid {self._pid}) has exited."
+        self._notifier.send(message, subject="Process finished", event={"source": f"pid:{self._pid}", "state": "exited"})
+        self._notifier.print_local_hint()
+
+    def monitor_until_exit(self) -> None:
+        """Notify once the process exited.
+
+        Raises:
+            RuntimeError: If the process does not exist or processes cannot be watched on this platform.
+        """
+        waiter = _ExitWaiter(self._pid)
+        print(f"Waiting for {self._label()} to exit...")
+        try:
+            waiter.wait(None)
+        finally:
+            waiter.close()
+        self._notify_exit()
+
+    def _sample(self) -> Tuple[Dict[int, int], Dict[int, int]]:
+        cpu: Dict[int, int] = {}
+        io: Dict[int, int] = {}
+        for pid in process_tree(self._pid):
+            ticks = _cpu_ticks(pid)
+            if ticks is not None:
+                cpu[pid] = ticks
+            chars = _io_bytes(pid)
+            if chars is not None:
+                io[pid] = chars
+        return cpu, io
+
+    @staticmethod
+    def _delta(before: Dict[int, int], after: Dict[int, int]) -> int:
+        # Processes that appeared during the interval count with everything they did so far.
+        return sum(max(value - before.get(pid, 0), 0) for pid, value in after.items())
+
+    def monitor_until_idle(self) -> None:
+        if not os.path.isdir(f"{_PROC}/{self._pid}"):
+            raise RuntimeError(f"Cannot read {_PROC}/{self._pid}; idle detection requires Linux /proc.")
+
+        interval = self._settings.interval_seconds
+        threshold_seconds = self._settings.stable_seconds_threshold
+        print(
+            f"Monitoring {self._label()} and its children at interval {interval}s, "
+            f"declaring idle after {threshold_seconds}s below {self._cpu_idle_percent:g}% CPU "
+            f"and {self._io_idle_bytes:g} bytes/s I/O..."
+        )
+
+        waiter = _ExitWaiter(self._pid)
+        stable_time = 0.0
+        cpu_before, io_before = self._sample()
+        last = time.monotonic()
+        try:
+            while True:
+                # Sleeps for one interval, but returns immediately if the process exits.
+                if waiter.wait(interval):
+                    self._notify_exit()
+                    return
+
+                cpu_after, io_after = self._sample()
+                now = time.monotonic()
+                elapsed = max(now - last, 1e-6)
+                cpu_percent = self._delta(cpu_before, cpu_after) / float(self._clock_ticks) / elapsed * 100.0
+                io_rate = self._delta(io_before, io_after) / elapsed
+                cpu_before, io_before, last = cpu_after, io_after, now
+
+                if cpu_percent <= self._cpu_idle_percent and io_rate <= self._io_idle_bytes:
+                    stable_time += interval
+                else:
+                    stable_time = 0.0
+
+                if stable_time >= threshold_seconds:
+                    print(
+                        f"The {self._label()} has been idle for {stable_time:.0f}s "
+                        f"(cpu {cpu_percent:.1f}%, io {io_rate:.0f} B/s). Sending notifications."
+                    )
+                    message = f"Process {self._name} (pid {self._pid}) has been idle for {stable_time:.0f} seconds."
+                    self._notifier.send(
+                        message,
+                        subject="Process idle",
+                        event={"source": f"pid:{self._pid}", "state": "idle", "scores": {"cpuPercent": cpu_percent}},
+                    )
+                    self._notifier.print_local_hint()
+                    return
+        finally:
+            waiter.close()
@@ -0,0 +1,174 @@
+import collections
+import glob
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Counter, Optional, Tuple
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+
+        # Peak RSS (KiB on Linux, bytes on macOS) is the best portable approximation.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class MonitorProfiler:
+    """Periodically write profiles and memory snapshots of a running monitor.
+
+    A sampling profiler looks at the stacks of all threads (including the
+    executor threads that capture and score frames, which cProfile would
+    miss) every ``sample_interval`` seconds. Every ``report_interval`` seconds
+    it writes into ``directory``:
+
+    - ``profile-<time>.txt``: hottest functions by own and inclusive samples,
+    - ``profile-<time>.folded``: collapsed stacks for flame graph tools,
+    - ``memory-<time>.txt``: RSS, tracemalloc totals, top allocation sites
+      and the growth since the previous snapshot.
+
+    Only the newest ``keep`` files of each kind are kept.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        report_interval: float = 60.0,
+        sample_interval: float = 0.01,
+        keep: int = 10,
+        top: int = 25,
+        trace_frames: int = 10,
+    ) -> None:
+        self._directory = directory
+        self._report_interval = report_interval
+        self._sample_interval = sample_interval
+        self._keep = keep
+        self._top = top
+        self._trace_frames = trace_frames
+        self._stacks: Counter[Tuple[str, ...]] = collections.Counter()
+        self._samples = 0
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._trace_frames)
+            self._started_tracemalloc = True
+        self._thread = threading.Thread(target=self._run, name="monitor-profiler", daemon=True)
+        self._thread.start()
+        print(f"Profiling into {self._directory} every {self._report_interval:g}s")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.write_report()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self) -> "MonitorProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        next_report = time.monotonic() + self._report_interval
+        while not self._stop.wait(self._sample_interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Root first, like collapsed stack files
+                self._stacks[tuple(reversed(stack))] += 1
+            self._samples += 1
+            if time.monotonic() >= next_report:
+                self.write_report()
+                next_report = time.monotonic() + self._report_interval
+
+    def write_report(self) -> None:
+        """Write the profile and memory reports for the period since the last report."""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        stacks, samples = self._stacks, self._samples
+        self._stacks, self._samples = collections.Counter(), 0
+        self._write_profile(stamp, stacks, samples)
+        self._write_memory(stamp)
+        for pattern in ("profile-*.txt", "profile-*.folded", "memory-*.txt"):
+            self._rotate(pattern)
+
+    def _write_profile(self, stamp: str, stacks: Counter[Tuple[str, ...]], samples: int) -> None:
+        own: Counter[str] = collections.Counter()
+        inclusive: Counter[str] = collections.Counter()
+        for stack, count in stacks.items():
+            if not stack:
+                continue
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+
+        total = max(sum(stacks.values()), 1)
+        lines = [f"{samples} sampling rounds, {total} thread samples", "", "Own time:"]
+        lines += [f"{100.0 * count / total:6.2f}%  {label}" for label, count in own.most_common(self._top)]
+        lines += ["", "Inclusive time:"]
+        lines += [f"{100.0 * count / total:6.2f}%  {label}" for label, count in inclusive.most_common(self._top)]
+        with open(os.path.join(self._directory, f"profile-{stamp}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        with open(os.path.join(self._directory, f"profile-{stamp}.folded"), "w", encoding="utf-8") as f:
+            for stack, count in stacks.items():
+                f.write(";".join(stack) + f" {count}\n")
+
+    def _write_memory(self, stamp: str) -> None:
+        lines = []
+        rss = current_rss_bytes()
+        if rss is not None:
+            lines.append(f"RSS: {rss / 1e6:.1f} MB")
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+            )
+            stats = snapshot.statistics("lineno")
+            lines.append(f"Traced: {current / 1e6:.2f} MB (peak {peak / 1e6:.2f} MB), {sum(s.count for s in stats)} blocks")
+            lines += ["", "Top allocation sites:"]
+            lines += [str(stat) for stat in stats[: self._top]]
+            if self._previous_snapshot is not None:
+                lines += ["", "Growth since previous snapshot:"]
+                lines += [str(stat) for stat in snapshot.compare_to(self._previous_snapshot, "lineno")[: self._top]]
+            self._previous_snapshot = snapshot
+        with open(os.path.join(self._directory, f"memory-{stamp}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _rotate(self, pattern: str) -> None:
+        files = sorted(glob.glob(os.path.join(self._directory, pattern)))
+        for path in files[: max(len(files) - self._keep, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
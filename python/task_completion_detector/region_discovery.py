@@ -0,0 +1,182 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PIL import ImageGrab
+
+from .models import Region
+
+
+@dataclass
+class Hotspot:
+    region: Region
+    activity: float  # fraction of sampled ticks in which the area changed
+
+
+class RegionDiscovery:
+    """Propose tight regions around the parts of the screen that actually change.
+
+    Each sampled frame is reduced to one grayscale value per block (a box
+    average done by Pillow), compared with the previous frame, and the changed
+    blocks are accumulated in an activity heatmap. Connected groups of active
+    blocks become the proposed regions.
+    """
+
+    def __init__(
+        self,
+        area: Optional[Region] = None,
+        block_size: int = 16,
+        pixel_threshold: float = 4.0,
+        pixel_scale: Optional[float] = None,
+        capture: Optional[Callable[[Optional[Tuple[int, int, int, int]]], object]] = None,
+    ) -> None:
+        """Create a discovery session.
+
+        Args:
+            area (Optional[Region]): Screen area to sample; the whole screen if None.
+            block_size (int): Edge length of a heatmap block in captured pixels.
+            pixel_threshold (float): Minimum change of a block's mean gray value to count as activity.
+            pixel_scale (Optional[float]): Captured pixels per screen coordinate (e.g. 2 on Retina
+                displays). Derived from the capture when an area is given.
+            capture: Optional replacement for ImageGrab.grab (takes a bbox).
+        """
+        self._area = area
+        self._block = max(int(block_size), 1)
+        self._pixel_threshold = float(pixel_threshold)
+        self._pixel_scale = pixel_scale
+        self._capture = capture or (lambda bbox: ImageGrab.grab(bbox=bbox))
+        self._heatmap: Optional[np.ndarray] = None
+        self._ticks = 0
+
+    def _grab_blocks(self) -> np.ndarray:
+        bbox = None
+        if self._area is not None:
+            bbox = (
+                self._area.x,
+                self._area.y,
+                self._area.x + self._area.width,
+                self._area.y + self._area.height,
+            )
+        image = self._capture(bbox)
+        if self._pixel_scale is None:
+            self._pixel_scale = image.width / float(self._area.width) if self._area is not None else 1.0
+        gray = image.convert("L")
+        # Crop to whole blocks so every heatmap cell covers the same area
+        width = gray.width - gray.width % self._block
+        height = gray.height - gray.height % self._block
+        if width == 0 or height == 0:
+            raise ValueError("Sampled area is smaller than one block.")
+        if (width, height) != gray.size:
+            gray = gray.crop((0, 0, width, height))
+        return np.asarray(gray.reduce(self._block), dtype=np.int16)
+
+    def sample(self, duration_seconds: float, interval_seconds: float = 1.0) -> np.ndarray:
+        """Capture frames for a while and accumulate the per-block activity heatmap.
+
+        Returns:
+            np.ndarray: Number of ticks in which each block changed.
+        """
+        previous = self._grab_blocks()
+        if self._heatmap is None:
+            self._heatmap = np.zeros(previous.shape, dtype=np.uint32)
+        deadline = time.monotonic() + float(duration_seconds)
+        while time.monotonic() < deadline:
+            time.sleep(interval_seconds)
+            current = self._grab_blocks()
+            self._heatmap += np.abs(current - previous) > self._pixel_threshold
+            self._ticks += 1
+            previous = current
+        return self._heatmap
+
+    def propose(
+        self,
+        min_activity: float = 0.05,
+        padding_blocks: int = 1,
+        max_regions: int = 5,
+    ) -> List[Hotspot]:
+        """Turn the heatmap into tight bounding boxes around the active areas.
+
+        Args:
+            min_activity (float): Fraction of ticks a block must have changed in to count as active.
+            padding_blocks (int): Margin added around each component, in blocks.
+            max_regions (int): Maximum number of proposals, most active first.
+
+        Returns:
+            List[Hotspot]: Proposed regions in screen coordinates.
+        """
+        if self._heatmap is None or self._ticks == 0:
+            return []
+        activity = self._heatmap / float(self._ticks)
+        labels = _label_components(activity >= min_activity)
+
+        rows, cols = activity.shape
+        boxes: List[List[float]] = []
+        for label in np.unique(labels[labels >= 0]):
+            ys, xs = np.nonzero(labels == label)
+            boxes.append(
+                [
+                    max(int(ys.min()) - padding_blocks, 0),
+                    max(int(xs.min()) - padding_blocks, 0),
+                    min(int(ys.max()) + padding_blocks, rows - 1),
+                    min(int(xs.max()) + padding_blocks, cols - 1),
+                    float(self._heatmap[labels == label].sum()),
+                ]
+            )
+        boxes = _merge_overlapping(boxes)
+        boxes.sort(key=lambda box: box[4], reverse=True)
+
+        scale = self._pixel_scale or 1.0
+        origin_x = self._area.x if self._area is not None else 0
+        origin_y = self._area.y if self._area is not None else 0
+        hotspots: List[Hotspot] = []
+        for top, left, bottom, right, total in boxes[:max_regions]:
+            region = Region(
+                x=origin_x + int(left * self._block / scale),
+                y=origin_y + int(top * self._block / scale),
+                width=int(round((right - left + 1) * self._block / scale)),
+                height=int(round((bottom - top + 1) * self._block / scale)),
+            )
+            blocks = (bottom - top + 1) * (right - left + 1)
+            hotspots.append(Hotspot(region=region, activity=total / (blocks * self._ticks)))
+        return hotspots
+
+
+def _label_components(mask: np.ndarray) -> np.ndarray:
+    """Label 8-connected components of a boolean grid (-1 for background).
+
+    Vectorized min-label propagation: every active cell repeatedly takes the
+    smallest label among its active neighbours until nothing changes.
+    """
+    rows, cols = mask.shape
+    background = rows * cols
+    labels = np.where(mask, np.arange(background).reshape(rows, cols), background)
+    shifts = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+    while True:
+        padded = np.pad(labels, 1, constant_values=background)
+        best = labels.copy()
+        for dy, dx in shifts:
+            best = np.minimum(best, padded[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols])
+        best = np.where(mask, best, background)
+        if np.array_equal(best, labels):
+            break
+        labels = best
+    return np.where(mask, labels, -1)
+
+
+def _merge_overlapping(boxes: List[List[float]]) -> List[List[float]]:
+    """Merge padded boxes that overlap so proposals never cover the same blocks twice."""
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]), a[4] + b[4]]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
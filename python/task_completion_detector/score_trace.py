@@ -0,0 +1,145 @@
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+# File layout (little endian):
+#   header: magic (8s), version (H), mode (B), tile count (B), interval seconds (d)
+#   records: timestamp (d), kind (B), mean score (f), max tile score (f), tile scores (f * tile count)
+TRACE_MAGIC = b"TCDTRACE"
+TRACE_VERSION = 1
+TILE_GRID = (4, 4)
+
+RECORD_TICK = 1
+RECORD_DONE = 2
+
+MODE_STABLE = 0
+MODE_CHANGE = 1
+
+_HEADER = struct.Struct("<8sHBBd")
+
+
+def tile_scores(diff_image, grid: Sequence[int] = TILE_GRID) -> List[float]:
+    """Return the mean difference of each tile of a grayscale difference image.
+
+    Args:
+        diff_image: Grayscale difference plane (2D uint8 numpy array).
+        grid (Sequence[int]): Number of tile columns and rows.
+
+    Returns:
+        List[float]: Tile means in row-major order.
+    """
+    cols, rows = grid
+    height, width = diff_image.shape
+    scores: List[float] = []
+    for row in range(rows):
+        top = height * row // rows
+        bottom = max(height * (row + 1) // rows, top + 1)
+        for col in range(cols):
+            left = width * col // cols
+            right = max(width * (col + 1) // cols, left + 1)
+            scores.append(float(diff_image[top:bottom, left:right].mean()))
+    return scores
+
+
+class ScoreTraceWriter:
+    """Append a compact binary per-tick score trace for offline threshold tuning."""
+
+    def __init__(self, path: str, interval_seconds: float, mode: str = "stable") -> None:
+        self._tile_count = TILE_GRID[0] * TILE_GRID[1]
+        self._record = struct.Struct(f"<dBff{self._tile_count}f")
+        self._empty_tiles = (0.0,) * self._tile_count
+        self._file = open(path, "wb")
+        self._file.write(
+            _HEADER.pack(
+                TRACE_MAGIC,
+                TRACE_VERSION,
+                MODE_CHANGE if mode == "change" else MODE_STABLE,
+                self._tile_count,
+                float(interval_seconds),
+            )
+        )
+        self._file.flush()
+
+    def write_tick(self, score: float, diff_image=None, timestamp: Optional[float] = None) -> None:
+        """Record the scores of one monitoring tick.
+
+        Args:
+            score (float): Mean difference score used by the monitor.
+            diff_image: Optional grayscale difference plane to derive tile scores from.
+            timestamp (Optional[float]): Wall clock time of the tick; defaults to now.
+        """
+        tiles = tile_scores(diff_image) if diff_image is not None else [score] * self._tile_count
+        self._write(RECORD_TICK, score, max(tiles), tiles, timestamp)
+
+    def mark_done(self, timestamp: Optional[float] = None) -> None:
+        """Record when the watched task actually completed (ground truth for tuning)."""
+        self._write(RECORD_DONE, 0.0, 0.0, self._empty_tiles, timestamp)
+
+    def _write(self, kind: int, score: float, max_score: float, tiles: Sequence[float], timestamp: Optional[float]) -> None:
+        if self._file.closed:
+            return
+        ts = time.time() if timestamp is None else float(timestamp)
+        self._file.write(self._record.pack(ts, kind, float(score), float(max_score), *tiles))
+        # Flush every record so an interrupted watch still leaves a usable trace.
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+@dataclass
+class ScoreTrace:
+    path: str
+    mode: str
+    interval_seconds: float
+    timestamps: Any  # numpy.ndarray (float64)
+    mean_scores: Any  # numpy.ndarray (float32)
+    max_scores: Any  # numpy.ndarray (float32)
+    tile_scores: Any  # numpy.ndarray (float32, ticks x tiles)
+    done_at: Optional[float]
+
+
+def read_score_trace(path: str) -> ScoreTrace:
+    """Load a trace written by ScoreTraceWriter into numpy arrays.
+
+    Raises:
+        ValueError: If the file is not a score trace of a supported version.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a score trace (file too short).")
+        magic, version, mode, tile_count, interval = _HEADER.unpack(header)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            raise ValueError(f"{path} is not a version {TRACE_VERSION} score trace.")
+        record_dtype = np.dtype(
+            [
+                ("t", "<f8"),
+                ("kind", "u1"),
+                ("mean", "<f4"),
+                ("max", "<f4"),
+                ("tiles", "<f4", (tile_count,)),
+            ]
+        )
+        raw = f.read()
+
+    # Ignore a partially written last record (e.g. the process was killed mid-write)
+    usable = len(raw) - len(raw) % record_dtype.itemsize
+    records = np.frombuffer(raw[:usable], dtype=record_dtype)
+    ticks = records[records["kind"] == RECORD_TICK]
+    done = records["t"][records["kind"] == RECORD_DONE]
+
+    return ScoreTrace(
+        path=path,
+        mode="change" if mode == MODE_CHANGE else "stable",
+        interval_seconds=float(interval),
+        timestamps=ticks["t"],
+        mean_scores=ticks["mean"],
+        max_scores=ticks["max"],
+        tile_scores=ticks["tiles"],
+        done_at=float(done[-1]) if len(done) else None,
+    )
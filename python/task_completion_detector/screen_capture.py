@@ -0,0 +1,292 @@
+import ctypes
+import ctypes.util
+import os
+import platform
+import sys
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import ImageGrab
+
+# (left, top, right, bottom) in screen coordinates
+BBox = Tuple[int, int, int, int]
+
+
+class PILCapture:
+    """Capture through PIL's ImageGrab (every platform; allocates a new image per grab)."""
+
+    def __init__(self, bbox: BBox) -> None:
+        self._bbox = bbox
+
+    def grab(self):
+        return ImageGrab.grab(bbox=self._bbox)
+
+    def close(self) -> None:
+        pass
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage; the function table that follows is not used.
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+_ZPIXMAP = 2
+_LSB_FIRST = 0
+_ALL_PLANES = ctypes.c_ulong(-1).value
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+_XERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+_libs = None
+_libs_lock = threading.Lock()
+_x_errors = 0
+
+
+@_XERROR_HANDLER
+def _on_x_error(_display, _event) -> int:
+    # Xlib's default handler terminates the process; count the error and let the grab fail instead.
+    global _x_errors
+    _x_errors += 1
+    return 0
+
+
+def init_threads() -> None:
+    """Load Xlib and make it thread safe, before anything else in the process uses it.
+
+    XInitThreads must be the first Xlib call of a process, so the CLI calls
+    this before it monitors a screen region with the auto or xshm backend.
+    Without it the XShm backend still initializes lazily,
+    unless Tk was imported first (see _load_libraries).
+    """
+    if platform.system() != "Linux" or not os.environ.get("DISPLAY"):
+        return
+    try:
+        _load_libraries()
+    except OSError:
+        pass
+
+
+def _load_libraries():
+    """Load libX11, libXext and libc once, or raise OSError if unavailable."""
+    global _libs
+    with _libs_lock:
+        if _libs is not None:
+            return _libs
+        names = [ctypes.util.find_library(name) for name in ("X11", "Xext", "c")]
+        if not all(names):
+            raise OSError("libX11 / libXext not found")
+        x11, xext, libc = (ctypes.CDLL(name, use_errno=True) for name in names)
+
+        x11.XInitThreads.restype = ctypes.c_int
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XDefaultScreen.restype = ctypes.c_int
+        x11.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultDepth.restype = ctypes.c_int
+        x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayWidth.restype = ctypes.c_int
+        x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayHeight.restype = ctypes.c_int
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XSetErrorHandler.argtypes = [_XERROR_HANDLER]
+        x11.XSetErrorHandler.restype = ctypes.c_void_p
+
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmQueryExtension.restype = ctypes.c_int
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+            ctypes.c_uint,
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.POINTER(_XShmSegmentInfo),
+            ctypes.c_uint,
+            ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmAttach.restype = ctypes.c_int
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_ulong,
+            ctypes.POINTER(_XImage),
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_ulong,
+        ]
+        xext.XShmGetImage.restype = ctypes.c_int
+
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmget.restype = ctypes.c_int
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+        if "tkinter" in sys.modules:
+            # Tk may already have called into Xlib; XInitThreads after that is undefined behaviour.
+            raise OSError("Xlib was used by Tk before XInitThreads")
+        x11.XInitThreads()
+        x11.XSetErrorHandler(_on_x_error)
+        _libs = (x11, xext, libc)
+        return _libs
+
+
+class XShmCapture:
+    """Capture an X11 screen region into one shared memory segment.
+
+    The X server writes every grab straight into memory shared with this
+    process (MIT-SHM), so grabbing allocates nothing. ``grab`` returns a
+    BGRX numpy view of that memory, which the next grab overwrites; the
+    pipeline converts it into its own grayscale buffers right away (see
+    frame_buffers.py) and copies it only when a notification needs an image.
+    """
+
+    def __init__(self, bbox: BBox, display: Optional[str] = None) -> None:
+        """Attach a shared memory image for the region.
+
+        Raises:
+            OSError: If Xlib / MIT-SHM is unavailable or the region is off screen.
+        """
+        self._x11, self._xext, self._libc = _load_libraries()
+        left, top, right, bottom = bbox
+        self._x, self._y = left, top
+        width, height = right - left, bottom - top
+
+        self._display = self._x11.XOpenDisplay(display.encode() if display else None)
+        if not self._display:
+            raise OSError("Cannot open X display")
+        self._image = None
+        self._shminfo = _XShmSegmentInfo()
+        self._attached = False
+        try:
+            if not self._xext.XShmQueryExtension(self._display):
+                raise OSError("X server does not support MIT-SHM")
+            screen = self._x11.XDefaultScreen(self._display)
+            screen_size = (self._x11.XDisplayWidth(self._display, screen), self._x11.XDisplayHeight(self._display, screen))
+            if width <= 0 or height <= 0 or left < 0 or top < 0 or right > screen_size[0] or bottom > screen_size[1]:
+                raise OSError(f"Region {bbox} is outside the {screen_size[0]}x{screen_size[1]} screen")
+            self._root = self._x11.XRootWindow(self._display, screen)
+
+            self._image = self._xext.XShmCreateImage(
+                self._display,
+                self._x11.XDefaultVisual(self._display, screen),
+                self._x11.XDefaultDepth(self._display, screen),
+                _ZPIXMAP,
+                None,
+                ctypes.byref(self._shminfo),
+                width,
+                height,
+            )
+            if not self._image:
+                raise OSError("XShmCreateImage failed")
+            image = self._image.contents
+            if image.bits_per_pixel != 32 or image.byte_order != _LSB_FIRST:
+                raise OSError(f"Unsupported X image format ({image.bits_per_pixel} bpp)")
+
+            size = image.bytes_per_line * height
+            self._shminfo.shmid = self._libc.shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+            if self._shminfo.shmid < 0:
+                raise OSError(ctypes.get_errno(), "shmget failed")
+            address = self._libc.shmat(self._shminfo.shmid, None, 0)
+            # Mark for removal now; the segment lives until both sides detached, even after a crash.
+            self._libc.shmctl(self._shminfo.shmid, _IPC_RMID, None)
+            if address in (None, ctypes.c_void_p(-1).value):
+                raise OSError(ctypes.get_errno(), "shmat failed")
+            self._shminfo.shmaddr = address
+            self._shminfo.readOnly = 0
+            image.data = address
+
+            errors = _x_errors
+            self._xext.XShmAttach(self._display, ctypes.byref(self._shminfo))
+            self._x11.XSync(self._display, 0)
+            if _x_errors != errors:
+                raise OSError("XShmAttach failed (remote X display?)")
+            self._attached = True
+
+            rows = np.ctypeslib.as_array((ctypes.c_uint8 * size).from_address(address))
+            self._pixels = rows.reshape(height, image.bytes_per_line)[:, : width * 4].reshape(height, width, 4)
+        except Exception:
+            self.close()
+            raise
+
+    def grab(self) -> np.ndarray:
+        """Grab the region; returns the shared BGRX buffer (valid until the next grab)."""
+        errors = _x_errors
+        ok = self._xext.XShmGetImage(self._display, self._root, self._image, self._x, self._y, _ALL_PLANES)
+        if not ok or _x_errors != errors:
+            raise OSError("XShmGetImage failed")
+        return self._pixels
+
+    def close(self) -> None:
+        if self._display is None:
+            return
+        if self._attached:
+            self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+            self._x11.XSync(self._display, 0)
+            self._attached = False
+        if self._shminfo.shmaddr:
+            self._libc.shmdt(self._shminfo.shmaddr)
+            self._shminfo.shmaddr = None
+        if self._image:
+            # The pixel memory was the shared segment; only free the XImage itself.
+            self._image.contents.data = None
+            self._x11.XFree(self._image)
+            self._image = None
+        self._pixels = None
+        self._x11.XCloseDisplay(self._display)
+        self._display = None
+
+
+def create_capture(bbox: BBox, backend: str = "auto"):
+    """Create the capture backend for a screen region.
+
+    Args:
+        bbox (BBox): Region in screen coordinates.
+        backend (str): "xshm" (X11 shared memory, Linux), "pil" (ImageGrab) or
+            "auto" (xshm where available, otherwise pil).
+
+    Returns:
+        XShmCapture or PILCapture.
+    """
+    if backend in ("auto", "xshm"):
+        try:
+            if platform.system() != "Linux" or not os.environ.get("DISPLAY"):
+                raise OSError("no X11 display")
+            return XShmCapture(bbox)
+        except OSError as exc:
+            if backend == "xshm":
+                print(f"XShm capture unavailable ({exc}); falling back to ImageGrab.")
+    return PILCapture(bbox)
@@ -0,0 +1,161 @@
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from .monitor import RegionMonitor
+from .pipeline import Rule
+from .profiling import current_rss_bytes
+
+
+class SyntheticFrames:
+    """Capture replacement that plays a repeating busy / quiet scenario.
+
+    During the busy phase every frame shows different noise; during the quiet
+    phase the last busy frame repeats, so stability and change detection
+    fire and re-arm over and over. All images are generated up front, which
+    keeps the generator itself out of the allocation measurements.
+
+    With ``raw``, frames are copied into one reused BGRX buffer like the XShm
+    capture backend does, instead of being returned as PIL images.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        busy_frames: int = 5,
+        quiet_frames: int = 20,
+        seed: int = 0,
+        raw: bool = False,
+    ) -> None:
+        rng = np.random.default_rng(seed)
+        pixels = [rng.integers(0, 256, size=(height, width, 4), dtype=np.uint8) for _ in range(max(busy_frames, 1))]
+        self._frames = pixels if raw else [Image.fromarray(frame[:, :, :3], "RGB") for frame in pixels]
+        self._buffer = np.zeros((height, width, 4), dtype=np.uint8) if raw else None
+        self._busy_frames = max(busy_frames, 1)
+        self._period = self._busy_frames + max(quiet_frames, 0)
+        self._index = 0
+
+    def __call__(self):
+        position = self._index % self._period
+        self._index += 1
+        frame = self._frames[min(position, self._busy_frames - 1)]
+        if self._buffer is None:
+            return frame
+        np.copyto(self._buffer, frame)
+        return self._buffer
+
+
+@dataclass
+class SoakCheckpoint:
+    frames: int
+    seconds: float
+    rss_bytes: Optional[int]
+    traced_bytes: int
+
+
+@dataclass
+class SoakResult:
+    frames: int
+    seconds: float
+    events: int
+    rss_growth_bytes: Optional[int]
+    traced_growth_bytes: int
+    block_growth: int
+    checkpoints: List[SoakCheckpoint] = field(default_factory=list)
+    failures: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+
+def _live_blocks() -> int:
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return sum(stat.count for stat in snapshot.statistics("filename"))
+
+
+def run_soak(
+    monitor: RegionMonitor,
+    frames: int,
+    mode: str = "stable",
+    rules: Optional[Sequence[Rule]] = None,
+    warmup_frames: int = 1000,
+    checkpoints: int = 10,
+    max_rss_growth_mb: float = 16.0,
+    max_traced_growth_kb: float = 256.0,
+    max_block_growth: int = 2000,
+) -> SoakResult:
+    """Drive a monitor's pipeline through many frames and check that memory stays flat.
+
+    The pipeline is stepped synchronously without sleeping; detections are
+    counted but not notified. After ``warmup_frames`` (caches, lazy imports
+    and the noise floor settle) the RSS, the tracemalloc total and the number
+    of live Python allocations are recorded and compared at the end.
+
+    Args:
+        monitor (RegionMonitor): Monitor whose capture was replaced (see SyntheticFrames).
+        frames (int): Number of frames after the warmup.
+        mode (str): Monitoring mode when no rules are given.
+        rules (Optional[Sequence[Rule]]): Composite rules to evaluate instead of a mode.
+        warmup_frames (int): Frames to run before the baseline is taken.
+        checkpoints (int): How many progress lines to print.
+        max_rss_growth_mb (float): Allowed RSS growth.
+        max_traced_growth_kb (float): Allowed growth of memory traced by tracemalloc.
+        max_block_growth (int): Allowed growth of the number of live allocations.
+
+    Returns:
+        SoakResult: Measurements and the list of exceeded limits (empty when passed).
+    """
+    pipeline = monitor.pipeline(mode, rules=rules)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        events = 0
+        for _ in range(warmup_frames):
+            events += len(pipeline.step())
+
+        gc.collect()
+        base_rss = current_rss_bytes()
+        base_traced = tracemalloc.get_traced_memory()[0]
+        base_blocks = _live_blocks()
+
+        result_checkpoints: List[SoakCheckpoint] = []
+        every = max(frames // max(checkpoints, 1), 1)
+        start = time.perf_counter()
+        for index in range(1, frames + 1):
+            events += len(pipeline.step())
+            if index % every == 0 or index == frames:
+                elapsed = time.perf_counter() - start
+                checkpoint = SoakCheckpoint(index, elapsed, current_rss_bytes(), tracemalloc.get_traced_memory()[0])
+                result_checkpoints.append(checkpoint)
+                rss = f"{checkpoint.rss_bytes / 1e6:.1f} MB" if checkpoint.rss_bytes is not None else "n/a"
+                print(
+                    f"{index} frames, {index / max(elapsed, 1e-9):.0f} frames/s, RSS {rss}, "
+                    f"traced {(checkpoint.traced_bytes - base_traced) / 1e3:+.1f} kB"
+                )
+        seconds = time.perf_counter() - start
+
+        gc.collect()
+        end_rss = current_rss_bytes()
+        rss_growth = end_rss - base_rss if end_rss is not None and base_rss is not None else None
+        traced_growth = tracemalloc.get_traced_memory()[0] - base_traced
+        block_growth = _live_blocks() - base_blocks
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    result = SoakResult(frames, seconds, events, rss_growth, traced_growth, block_growth, result_checkpoints)
+    if rss_growth is not None and rss_growth > max_rss_growth_mb * 1e6:
+        result.failures.append(f"RSS grew by {rss_growth / 1e6:.1f} MB (limit {max_rss_growth_mb:g} MB)")
+    if traced_growth > max_traced_growth_kb * 1e3:
+        result.failures.append(f"Traced memory grew by {traced_growth / 1e3:.1f} kB (limit {max_traced_growth_kb:g} kB)")
+    if block_growth > max_block_growth:
+        result.failures.append(f"Live allocations grew by {block_growth} blocks (limit {max_block_growth})")
+    return result
@@ -0,0 +1,139 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass
+class TemplateMatch:
+    score: float  # normalized cross-correlation, -1..1
+    name: Optional[str]
+    x: int
+    y: int
+
+
+@dataclass
+class _Template:
+    name: str
+    pixels: np.ndarray  # zero-mean grayscale
+    norm: float
+
+
+class TemplateMatcher:
+    """Find saved template images anywhere inside a region.
+
+    Uses FFT-based normalized cross-correlation: the spectrum of each template
+    is computed once per frame size and cached, so every tick costs one forward
+    FFT of the frame plus one inverse FFT per template. Window energies for the
+    normalization come from integral images.
+    """
+
+    def __init__(self, templates: Sequence, scale: float = 1.0) -> None:
+        """Create a matcher.
+
+        Args:
+            templates (Sequence): Template image paths or PIL images.
+            scale (float): Downscale factor applied to frames and templates before
+                matching (e.g. 0.5 for a coarse, four times cheaper match).
+        """
+        self._scale = float(scale) if scale and scale > 0 else 1.0
+        self._templates: List[_Template] = []
+        for index, template in enumerate(templates):
+            if isinstance(template, str):
+                name = os.path.basename(template)
+                image = Image.open(template)
+            else:
+                name = f"template-{index + 1}"
+                image = template
+            pixels = self._to_array(image)
+            pixels = pixels - pixels.mean()
+            self._templates.append(_Template(name=name, pixels=pixels, norm=float(np.sqrt((pixels ** 2).sum()))))
+        if not self._templates:
+            raise ValueError("At least one template image is required.")
+        # Conjugated template spectra, keyed by frame shape
+        self._spectra: Dict[Tuple[int, int], List[Optional[np.ndarray]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _to_array(self, image) -> np.ndarray:
+        gray = image.convert("L")
+        if self._scale != 1.0:
+            width = max(int(round(gray.width * self._scale)), 1)
+            height = max(int(round(gray.height * self._scale)), 1)
+            gray = gray.resize((width, height), Image.Resampling.BILINEAR)
+        return np.asarray(gray, dtype=np.float64)
+
+    def _template_spectra(self, shape: Tuple[int, int]) -> List[Optional[np.ndarray]]:
+        spectra = self._spectra.get(shape)
+        if spectra is None:
+            spectra = []
+            for template in self._templates:
+                th, tw = template.pixels.shape
+                if th > shape[0] or tw > shape[1] or template.norm == 0.0:
+                    # Cannot match: larger than the frame or completely flat
+                    spectra.append(None)
+                    continue
+                spectra.append(np.conj(np.fft.rfft2(template.pixels, s=shape)))
+            self._spectra[shape] = spectra
+        return spectra
+
+    def match(self, image) -> TemplateMatch:
+        """Return the best match of any template in the given frame.
+
+        Args:
+            image: PIL image of the monitored region.
+
+        Returns:
+            TemplateMatch: Best score with the template name and its top-left
+            position in region coordinates (score 0 and no name if nothing matched).
+        """
+        frame = self._to_array(image)
+        shape = frame.shape
+        spectra = self._template_spectra(shape)
+        frame_spectrum = np.fft.rfft2(frame)
+
+        # Integral images of the frame and its square for window sums
+        integral = np.zeros((shape[0] + 1, shape[1] + 1))
+        integral[1:, 1:] = frame.cumsum(axis=0).cumsum(axis=1)
+        integral_sq = np.zeros_like(integral)
+        integral_sq[1:, 1:] = (frame ** 2).cumsum(axis=0).cumsum(axis=1)
+
+        best = TemplateMatch(score=0.0, name=None, x=0, y=0)
+        for template, spectrum in zip(self._templates, spectra):
+            if spectrum is None:
+                continue
+            th, tw = template.pixels.shape
+            rows, cols = shape[0] - th + 1, shape[1] - tw + 1
+            # Circular correlation is exact for all positions where the template fits
+            numerator = np.fft.irfft2(frame_spectrum * spectrum, s=shape)[:rows, :cols]
+
+            window_sum = _window_sums(integral, th, tw, rows, cols)
+            window_sq = _window_sums(integral_sq, th, tw, rows, cols)
+            variance = np.maximum(window_sq - window_sum ** 2 / (th * tw), 0.0)
+            denominator = np.sqrt(variance) * template.norm
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores = np.where(denominator > 1e-6, numerator / denominator, 0.0)
+
+            index = int(np.argmax(scores))
+            score = float(scores.flat[index])
+            if score > best.score:
+                y, x = divmod(index, cols)
+                best = TemplateMatch(
+                    score=score,
+                    name=template.name,
+                    x=int(round(x / self._scale)),
+                    y=int(round(y / self._scale)),
+                )
+        return best
+
+
+def _window_sums(integral: np.ndarray, height: int, width: int, rows: int, cols: int) -> np.ndarray:
+    return (
+        integral[height:height + rows, width:width + cols]
+        - integral[:rows, width:width + cols]
+        - integral[height:height + rows, :cols]
+        + integral[:rows, :cols]
+    )
@@ -0,0 +1,275 @@
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import sys
+import time
+from typing import Iterator, List, Optional
+
+from .config_loader import ConfigLoader
+from .monitor import MonitorSettings
+from .notifications import NotificationDispatcher
+
+
+class FileTail:
+    """Follow a growing file by offset, like ``tail -F``.
+
+    Only output written after the tail was created counts. Truncation and
+    rotation (a new file under the same path) are detected via size and inode.
+    New output is either only counted (``skip``) or read one chunk at a time
+    (``chunks``), so a burst of output never has to fit into memory at once.
+    Incomplete lines are buffered, but never beyond ``max_line_bytes`` (longer
+    lines are truncated), so a process that prints without newlines cannot grow
+    memory without bound.
+    """
+
+    def __init__(self, path: str, chunk_bytes: int = 64 * 1024, max_line_bytes: int = 64 * 1024) -> None:
+        self._path = path
+        self._chunk_bytes = chunk_bytes
+        self._max_line_bytes = max_line_bytes
+        self._file = None
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._partial = b""
+        self._open(start_at_end=True)
+
+    @property
+    def partial_line(self) -> str:
+        """Text after the last newline (e.g. an interactive prompt)."""
+        return self._partial.decode("utf-8", errors="replace")
+
+    def _open(self, start_at_end: bool) -> None:
+        try:
+            f = open(self._path, "rb")
+        except OSError:
+            self._file = None
+            self._inode = None
+            return
+        stat = os.fstat(f.fileno())
+        self._file = f
+        self._inode = stat.st_ino
+        self._offset = stat.st_size if start_at_end else 0
+        self._partial = b""
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _new_bytes(self) -> int:
+        """Follow truncation and rotation; return how many bytes were appended since the last read."""
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            # File removed; wait for it to come back.
+            self._close()
+            return 0
+
+        if self._file is None or stat.st_ino != self._inode:
+            # Created or rotated after we started: everything in it is new output.
+            self._close()
+            self._open(start_at_end=False)
+            if self._file is None:
+                return 0
+        elif stat.st_size < self._offset:
+            # Truncated in place (e.g. `> logfile`)
+            self._offset = 0
+            self._partial = b""
+        return max(stat.st_size - self._offset, 0)
+
+    def skip(self) -> int:
+        """Skip everything appended since the last call without reading it.
+
+        Returns:
+            int: Number of new bytes.
+        """
+        new_bytes = self._new_bytes()
+        if new_bytes:
+            self._offset += new_bytes
+            self._partial = b""
+        return new_bytes
+
+    def chunks(self) -> Iterator[List[str]]:
+        """Read the new output one chunk at a time.
+
+        Yields the lines completed by each chunk (possibly none). The offset
+        advances per chunk, so a caller that stops early (e.g. at the first
+        match) leaves the rest for the next call.
+        """
+        if not self._new_bytes():
+            return
+        self._file.seek(self._offset)
+        while True:
+            data = self._file.read(self._chunk_bytes)
+            if not data:
+                return
+            self._offset += len(data)
+            yield self._split(data)
+
+    def _split(self, data: bytes) -> List[str]:
+        buffer = self._partial + data
+        parts = buffer.split(b"\n")
+        self._partial = parts.pop()
+        if len(self._partial) > self._max_line_bytes:
+            # Emit an overlong line truncated instead of buffering it forever.
+            parts.append(self._partial[: self._max_line_bytes])
+            self._partial = b""
+        return [part.decode("utf-8", errors="replace").rstrip("\r") for part in parts]
+
+    def close(self) -> None:
+        self._close()
+
+
+class _InotifyWaiter:
+    """Block until a file's directory reports a change (Linux inotify), or a timeout."""
+
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+
+    def __init__(self, path: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch the directory so creation and rotation of the file are seen as well.
+        directory = os.path.dirname(os.path.abspath(path)) or "."
+        mask = self._IN_MODIFY | self._IN_CLOSE_WRITE | self._IN_MOVED_TO | self._IN_CREATE
+        if libc.inotify_add_watch(self._fd, directory.encode(), mask) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> None:
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0.0))
+        if ready:
+            # Drain pending events; we only care that something happened.
+            try:
+                while os.read(self._fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _SleepWaiter:
+    def wait(self, timeout: float) -> None:
+        time.sleep(max(timeout, 0.0))
+
+    def close(self) -> None:
+        pass
+
+
+def _create_waiter(path: str):
+    if sys.platform.startswith("linux"):
+        try:
+            return _InotifyWaiter(path)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return _SleepWaiter()
+
+
+class TextSourceMonitor:
+    """Monitor the output of a log file instead of screen pixels.
+
+    Offers the same semantics as RegionMonitor at a fraction of the cost:
+    stability mode fires after ``stable_seconds_threshold`` seconds without new
+    output, change mode fires on new output or as soon as ``pattern`` appears.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        settings: MonitorSettings,
+        config_loader: Optional[ConfigLoader] = None,
+        pattern: Optional[str] = None,
+    ) -> None:
+        self._path = path
+        self._settings = settings
+        self._config_loader = config_loader or ConfigLoader()
+        self._pattern = re.compile(pattern) if pattern else None
+        self._notifier = NotificationDispatcher(self._config_loader)
+
+    def monitor_until_stable(self) -> None:
+        interval = self._settings.interval_seconds
+        threshold_seconds = self._settings.stable_seconds_threshold
+
+        print(
+            f"Monitoring output of {self._path} at interval {interval}s, "
+            f"declaring stable after {threshold_seconds}s without new output..."
+        )
+        tail = FileTail(self._path)
+        last_output = time.monotonic()
+        try:
+            while True:
+                # Only the amount of output matters here; none of it is read.
+                new_bytes = tail.skip()
+                now = time.monotonic()
+                if new_bytes:
+                    last_output = now
+
+                quiet = now - last_output
+                if quiet >= threshold_seconds:
+                    print(f"No new output for {quiet:.0f}s. Sending notifications.")
+                    message = f"No new output in {os.path.basename(self._path)} for {quiet:.0f} seconds."
+                    self._notifier.send(message, event={"source": f"file:{self._path}", "state": "stable"})
+                    self._notifier.print_local_hint()
+                    break
+
+                time.sleep(interval)
+        finally:
+            tail.close()
+
+    def monitor_until_change(self) -> None:
+        """Notify on new output, or when the configured pattern appears."""
+        interval = self._settings.interval_seconds
+        target = f"pattern '{self._pattern.pattern}'" if self._pattern else "new output"
+
+        print(f"Watching {self._path} for {target}...")
+        tail = FileTail(self._path)
+        waiter = _create_waiter(self._path)
+        try:
+            while True:
+                hit = self._find_hit(tail)
+                if hit is not None:
+                    print(f"Detected {target} in {self._path}. Sending notifications.")
+                    name = os.path.basename(self._path)
+                    if self._pattern:
+                        message = f"Pattern '{self._pattern.pattern}' appeared in {name}:\n{hit[:200]}"
+                        subject = "Pattern detected"
+                    else:
+                        message = f"New output in {name}:\n{hit[:200]}"
+                        subject = "Change detected"
+                    state = "pattern" if self._pattern else "changed"
+                    self._notifier.send(
+                        message,
+                        subject=subject,
+                        event={"source": f"file:{self._path}", "state": state},
+                    )
+                    self._notifier.print_local_hint()
+                    break
+
+                # Wakes up immediately on writes where inotify is available.
+                waiter.wait(interval)
+        finally:
+            waiter.close()
+            tail.close()
+
+    def _find_hit(self, tail: FileTail) -> Optional[str]:
+        """Scan the new output chunk by chunk and stop at the first hit."""
+        new_output = False
+        for lines in tail.chunks():
+            new_output = True
+            if self._pattern is None:
+                return (lines[-1] if lines else tail.partial_line).strip()
+            for line in lines:
+                if self._pattern.search(line):
+                    return line.strip()
+        # Prompts are often printed without a trailing newline
+        partial = tail.partial_line
+        if new_output and partial and self._pattern is not None and self._pattern.search(partial):
+            return partial.strip()
+        return None
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .score_trace import ScoreTrace
+
+
+@dataclass
+class TuningResult:
+    stable_seconds: float
+    difference_threshold: float
+    false_positive_rate: float
+    # Seconds between the real completion and the notification (NaN if every trace fired early)
+    mean_latency: float
+    max_latency: float
+
+
+def _fire_times(trace: ScoreTrace, stable_seconds: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Simulate stability mode on one trace for every threshold combination.
+
+    Mirrors RegionMonitor.monitor_until_stable: each quiet tick (score <= threshold)
+    adds one interval to the stable time, any busy tick resets it, and the monitor
+    fires once the stable time reaches stableSecondsThreshold. If the trace ends
+    before that, the region is assumed to stay quiet.
+
+    Returns:
+        np.ndarray: Fire timestamps with shape (len(thresholds), len(stable_seconds)).
+    """
+    scores = trace.mean_scores.astype(np.float64)
+    timestamps = trace.timestamps
+    interval = trace.interval_seconds
+    ticks = len(scores)
+    idx = np.arange(ticks)
+
+    quiet = scores[None, :] <= thresholds[:, None]
+    # Length of the quiet run ending at each tick
+    last_busy = np.maximum.accumulate(np.where(quiet, -1, idx[None, :]), axis=1)
+    run = idx[None, :] - last_busy
+    longest = np.maximum.accumulate(run, axis=1)
+    needed = np.ceil(stable_seconds / interval - 1e-9).astype(np.int64)
+
+    fire = np.empty((len(thresholds), len(stable_seconds)), dtype=np.float64)
+    for row in range(len(thresholds)):
+        pos = np.searchsorted(longest[row], needed, side="left")
+        inside = pos < ticks
+        fire[row, inside] = timestamps[pos[inside]]
+        # Extend the final quiet run past the end of the trace
+        missing = last_busy[row, -1] + needed[~inside] - (ticks - 1)
+        fire[row, ~inside] = timestamps[-1] + missing * interval
+    return fire
+
+
+def evaluate_stable_grid(
+    traces: Sequence[ScoreTrace],
+    stable_seconds: Sequence[float],
+    difference_thresholds: Sequence[float],
+    limit: Optional[int] = None,
+) -> List[TuningResult]:
+    """Grid-search stability-mode thresholds over recorded traces.
+
+    A notification before a trace's completion time counts as a false positive;
+    otherwise its delay after completion is the detection latency.
+
+    Args:
+        traces (Sequence[ScoreTrace]): Stable-mode traces with a known completion time.
+        stable_seconds (Sequence[float]): Candidate stableSecondsThreshold values.
+        difference_thresholds (Sequence[float]): Candidate differenceThreshold values.
+        limit (Optional[int]): Only return the best ``limit`` combinations.
+
+    Returns:
+        List[TuningResult]: One result per combination, best first (fewest false
+        positives, then lowest mean latency).
+    """
+    stable = np.asarray(stable_seconds, dtype=np.float64)
+    thresholds = np.asarray(difference_thresholds, dtype=np.float64)
+    usable = [t for t in traces if t.done_at is not None and len(t.mean_scores)]
+    if not usable:
+        return []
+
+    latencies = np.stack([_fire_times(t, stable, thresholds) - t.done_at for t in usable])
+    early = latencies < 0
+    fp_rate = early.mean(axis=0)
+    on_time = np.where(early, 0.0, latencies)
+    on_time_count = (~early).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_latency = np.where(on_time_count > 0, on_time.sum(axis=0) / on_time_count, np.nan)
+    max_latency = np.where(on_time_count > 0, np.where(early, -np.inf, latencies).max(axis=0), np.nan)
+
+    order = np.lexsort((np.nan_to_num(mean_latency, nan=np.inf).ravel(), fp_rate.ravel()))
+    results: List[TuningResult] = []
+    for flat in order[:limit]:
+        row, col = np.unravel_index(flat, fp_rate.shape)
+        results.append(
+            TuningResult(
+                stable_seconds=float(stable[col]),
+                difference_threshold=float(thresholds[row]),
+                false_positive_rate=float(fp_rate[row, col]),
+                mean_latency=float(mean_latency[row, col]),
+                max_latency=float(max_latency[row, col]),
+            )
+        )
+    return results
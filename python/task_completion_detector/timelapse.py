@@ -0,0 +1,161 @@
+import math
+import time
+from collections import deque
+from io import BytesIO
+from typing import Deque, List, Optional, Tuple
+
+from PIL import Image
+
+
+class TimelapseRecorder:
+    """Keep a rolling GIF timelapse of a region while it is being monitored.
+
+    Every sampled frame is downsampled, quantized and GIF-encoded as soon as it
+    is captured. Only the encoded frame blocks are kept (bounded by the rolling
+    window), so rendering the final animation at notification time is a cheap
+    byte concatenation instead of an encoding burst.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        frame_interval_seconds: float = 5.0,
+        max_width: int = 480,
+        max_bytes: int = 5_000_000,
+        frame_duration_ms: int = 200,
+    ) -> None:
+        self._frame_interval = max(float(frame_interval_seconds), 0.0)
+        self._max_width = max(int(max_width), 16)
+        self._max_bytes = int(max_bytes)
+        self._frame_duration_ms = max(int(frame_duration_ms), 20)
+        max_frames = max(int(math.ceil(window_seconds / max(self._frame_interval, 0.001))), 1)
+        # Each entry: (width, height, color table, image descriptor + LZW data)
+        self._frames: Deque[Tuple[int, int, bytes, bytes]] = deque(maxlen=max_frames)
+        self._last_sample: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def wants_frame(self, now: Optional[float] = None) -> bool:
+        """Whether the next captured frame would be sampled (lets callers skip building an image)."""
+        if now is None:
+            now = time.monotonic()
+        return self._last_sample is None or now - self._last_sample >= self._frame_interval
+
+    def add_frame(self, image, now: Optional[float] = None) -> None:
+        """Sample a captured frame into the timelapse if the frame interval elapsed.
+
+        Args:
+            image: PIL image of the monitored region.
+            now (Optional[float]): Monotonic timestamp of the capture; defaults to now.
+        """
+        if image is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        if not self.wants_frame(now):
+            return
+        self._last_sample = now
+        try:
+            self._frames.append(self._encode_frame(image))
+        except Exception:
+            # A broken frame should never interrupt monitoring.
+            pass
+
+    def _encode_frame(self, image) -> Tuple[int, int, bytes, bytes]:
+        width, height = image.size
+        if width > self._max_width:
+            height = max(int(round(height * self._max_width / float(width))), 1)
+            width = self._max_width
+            image = image.resize((width, height), Image.Resampling.BILINEAR)
+        frame = image.convert("RGB").quantize(colors=128, method=Image.Quantize.FASTOCTREE)
+        buffer = BytesIO()
+        frame.save(buffer, format="GIF")
+        return _split_gif_frame(buffer.getvalue())
+
+    def render(self) -> Optional[bytes]:
+        """Assemble the buffered frames into an animated GIF.
+
+        Frames are dropped evenly (keeping the first and last) until the output
+        fits into ``max_bytes``.
+
+        Returns:
+            Optional[bytes]: GIF data, or None if no frames were recorded.
+        """
+        frames: List[Tuple[int, int, bytes, bytes]] = list(self._frames)
+        if not frames:
+            return None
+
+        while True:
+            data = self._assemble(frames)
+            if len(data) <= self._max_bytes or len(frames) <= 1:
+                return data if len(data) <= self._max_bytes else None
+            last = frames[-1]
+            frames = frames[:-1:2] + [last] if len(frames) > 2 else [last]
+
+    def _assemble(self, frames: List[Tuple[int, int, bytes, bytes]]) -> bytes:
+        width = max(f[0] for f in frames)
+        height = max(f[1] for f in frames)
+        out = bytearray(b"GIF89a")
+        out += width.to_bytes(2, "little") + height.to_bytes(2, "little")
+        out += b"\x00\x00\x00"  # no global color table
+        # NETSCAPE2.0 application extension: loop forever
+        out += b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+        delay = max(self._frame_duration_ms // 10, 2).to_bytes(2, "little")
+        for _, _, color_table, image_block in frames:
+            # Graphic control extension: disposal "do not dispose", no transparency
+            out += b"\x21\xf9\x04\x04" + delay + b"\x00\x00"
+            # Image descriptor with the frame's palette promoted to a local color table
+            size_bits = max(int(math.log2(len(color_table) // 3)) - 1, 0)
+            packed = 0x80 | (image_block[9] & 0x40) | size_bits
+            out += image_block[:9] + bytes([packed]) + color_table + image_block[10:]
+        out += b"\x3b"
+        return bytes(out)
+
+
+def _split_gif_frame(data: bytes) -> Tuple[int, int, bytes, bytes]:
+    """Extract the color table and image block from a single-frame GIF.
+
+    Returns:
+        Tuple[int, int, bytes, bytes]: Width, height, color table and the image
+        block (descriptor without its color table, followed by the LZW data).
+    """
+    if data[:3] != b"GIF":
+        raise ValueError("Not a GIF stream")
+    width = int.from_bytes(data[6:8], "little")
+    height = int.from_bytes(data[8:10], "little")
+    packed = data[10]
+    pos = 13
+    color_table = b""
+    if packed & 0x80:
+        size = 3 * (2 ** ((packed & 0x07) + 1))
+        color_table = data[pos:pos + size]
+        pos += size
+
+    # Skip extensions until the image descriptor
+    while data[pos] == 0x21:
+        pos += 2
+        while data[pos] != 0:
+            pos += data[pos] + 1
+        pos += 1
+    if data[pos] != 0x2C:
+        raise ValueError("GIF image descriptor not found")
+
+    descriptor = data[pos:pos + 10]
+    pos += 10
+    if descriptor[9] & 0x80:
+        size = 3 * (2 ** ((descriptor[9] & 0x07) + 1))
+        color_table = data[pos:pos + size]
+        pos += size
+    if not color_table:
+        raise ValueError("GIF frame has no color table")
+
+    # LZW minimum code size followed by data sub-blocks
+    start = pos
+    pos += 1
+    while data[pos] != 0:
+        pos += data[pos] + 1
+    pos += 1
+    # Frames are always placed at the top-left of the animation canvas
+    descriptor = b"\x2c\x00\x00\x00\x00" + descriptor[5:]
+    return width, height, color_table, descriptor + data[start:pos]